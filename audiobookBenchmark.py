@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Audiobook Combiner Benchmark - Time startup, discovery, planning and muxing
+Generates synthetic books with ffmpeg's lavfi sine source and writes the
+timings as JSON so runs can be compared over time.
+Requires: ffmpeg (install via: brew install ffmpeg)
+
+Usage:
+    python audiobookBenchmark.py
+    python audiobookBenchmark.py -o bench.json --repeat 5
+    python audiobookBenchmark.py --scenario many_small --scenario deep_tree
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import audiobookCombiner as combiner
+
+# (extension, seconds, sample rate, channels) of a synthetic source file
+SourceSpec = tuple[str, float, int, int]
+
+
+def many_small() -> list[tuple[str, SourceSpec]]:
+    return [(f"Chapter {i}.mp3", ("mp3", 2.0, 44100, 2)) for i in range(1, 201)]
+
+
+def few_huge() -> list[tuple[str, SourceSpec]]:
+    return [(f"Part {i}.m4a", ("m4a", 1200.0, 44100, 2)) for i in range(1, 4)]
+
+
+def mixed_codecs() -> list[tuple[str, SourceSpec]]:
+    specs: list[SourceSpec] = [
+        ("mp3", 5.0, 44100, 2),
+        ("m4a", 5.0, 48000, 2),
+        ("flac", 5.0, 44100, 1),
+        ("ogg", 5.0, 22050, 1),
+    ]
+    return [(f"Track {i:02d}.{specs[i % 4][0]}", specs[i % 4]) for i in range(1, 25)]
+
+
+def deep_tree() -> list[tuple[str, SourceSpec]]:
+    return [
+        (f"Part {p}/Disc {d}/Track {t}.mp3", ("mp3", 1.0, 44100, 2))
+        for p in range(1, 5)
+        for d in range(1, 6)
+        for t in range(1, 6)
+    ]
+
+
+# Each scenario lists (relative path, source spec). Every distinct spec is
+# synthesized once and copied, so fixture setup stays fast.
+SCENARIOS: dict[str, Callable[[], list[tuple[str, SourceSpec]]]] = {
+    "many_small": many_small,
+    "few_huge": few_huge,
+    "mixed_codecs": mixed_codecs,
+    "deep_tree": deep_tree,
+}
+
+ENCODERS = {
+    "mp3": "libmp3lame",
+    "m4a": "aac",
+    "flac": "flac",
+    "ogg": "libvorbis",
+}
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+
+def synthesize(spec: SourceSpec, dest: Path) -> None:
+    """Render a sine tone to dest with ffmpeg"""
+    extension, seconds, rate, channels = spec
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-v",
+        "error",
+        "-f",
+        "lavfi",
+        "-i",
+        f"sine=frequency=440:sample_rate={rate}:duration={seconds}",
+        "-ac",
+        str(channels),
+        "-c:a",
+        ENCODERS[extension],
+        str(dest),
+    ]
+    subprocess.run(cmd, check=True, stdin=subprocess.DEVNULL)
+
+
+def build_fixture(name: str, root: Path) -> Path:
+    """Create the book folder for a scenario (reused if it already exists)"""
+    book_dir = root / name
+    layout = SCENARIOS[name]()
+    if book_dir.exists() and all((book_dir / rel).exists() for rel, _ in layout):
+        return book_dir
+
+    sources_dir = root / ".sources"
+    sources_dir.mkdir(parents=True, exist_ok=True)
+    sources = {
+        spec: sources_dir / f"{spec[0]}-{spec[1]:g}s-{spec[2]}-{spec[3]}ch.{spec[0]}"
+        for spec in {spec for _, spec in layout}
+    }
+    with ThreadPoolExecutor() as pool:
+        list(
+            pool.map(
+                lambda item: item[1].exists() or synthesize(*item), sources.items()
+            )
+        )
+
+    for rel, spec in layout:
+        dest = book_dir / rel
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(sources[spec], dest)
+
+    # A few images so the cover lookup has something to rank
+    for image in ("cover.jpg", "back.jpg", "scan001.png"):
+        cover_cmd = ["ffmpeg", "-y", "-v", "error", "-f", "lavfi"]
+        cover_cmd += ["-i", "color=c=navy:s=800x800", "-frames:v", "1"]
+        cover_cmd.append(str(book_dir / image))
+        subprocess.run(cover_cmd, check=True, stdin=subprocess.DEVNULL)
+    return book_dir
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+
+def time_runs(
+    func: Callable[[], object],
+    repeat: int,
+    setup: Callable[[], None] | None = None,
+) -> dict:
+    """Time func `repeat` times, calling setup (untimed) before each run"""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return {
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "runs": runs,
+    }
+
+
+def run_cli(*args: str) -> None:
+    """Run the combiner script in a fresh interpreter
+
+    Raises RuntimeError if it fails, so a fast failure is not timed as a run.
+    """
+    cmd = [sys.executable, combiner.__file__, *args]
+    result = subprocess.run(
+        cmd, capture_output=True, text=True, stdin=subprocess.DEVNULL
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"{' '.join(args)} exited with {result.returncode}:\n"
+            f"{result.stderr or result.stdout}"
+        )
+
+
+def bench_startup(repeat: int) -> dict:
+    """Time interpreter startup plus module import, and --help"""
+    import_cmd = [sys.executable, "-c", "import audiobookCombiner"]
+    cwd = os.path.dirname(os.path.abspath(combiner.__file__))
+    return {
+        "python": time_runs(
+            lambda: subprocess.run([sys.executable, "-c", "pass"]), repeat
+        ),
+        "import": time_runs(lambda: subprocess.run(import_cmd, cwd=cwd), repeat),
+        "help": time_runs(lambda: run_cli("--help"), repeat),
+    }
+
+
+def clear_caches() -> None:
+    combiner._audio_files_cache.clear()
+    combiner._probe_cache.clear()
+
+
+def bench_scenario(book_dir: Path, out_dir: Path, repeat: int) -> dict:
+    """Time each stage of combining one synthetic book"""
+    output_file = str(out_dir / f"{book_dir.name}.m4b")
+
+    def discover() -> list[Path]:
+        return combiner.get_audio_files(str(book_dir), recursive=True)
+
+    audio_files = discover()
+
+    def remove_output() -> None:
+        clear_caches()
+        for path in (Path(output_file), combiner.manifest_path(output_file)):
+            if path.exists():
+                path.unlink()
+
+    def mux() -> None:
+        success, message = combiner.combine_audiobook(
+            str(book_dir),
+            output_file,
+            verbose=False,
+            incremental=False,
+            recursive=True,
+            cover_max_size=None,
+        )
+        if not success:
+            raise RuntimeError(message)
+
+    def skip() -> None:
+        success, message = combiner.combine_audiobook(
+            str(book_dir), output_file, verbose=False, recursive=True
+        )
+        if not success or not message.startswith(combiner.UP_TO_DATE_MESSAGE):
+            raise RuntimeError(f"Expected an up-to-date skip, got: {message}")
+
+    timings = {
+        "discovery_cold": time_runs(discover, repeat, setup=clear_caches),
+        "discovery_warm": time_runs(discover, repeat),
+        "cover_lookup": time_runs(
+            lambda: combiner.find_cover_image(str(book_dir)), repeat
+        ),
+        "planning_cold": time_runs(
+            lambda: combiner.plan_combine(audio_files, output_file),
+            repeat,
+            setup=clear_caches,
+        ),
+        "planning_warm": time_runs(
+            lambda: combiner.plan_combine(audio_files, output_file), repeat
+        ),
+        "mux": time_runs(mux, repeat, setup=remove_output),
+    }
+    # A rebuild of an unchanged book should only cost stat calls
+    timings["incremental_skip"] = time_runs(skip, repeat)
+    # Headless commands, each in a new process
+    timings["cli_list"] = time_runs(
+        lambda: run_cli("--list", "--recursive", str(book_dir)), repeat
+    )
+    timings["cli_verify"] = time_runs(lambda: run_cli("--verify", output_file), repeat)
+
+    plan = combiner.plan_combine(audio_files, output_file)
+    return {
+        "files": len(audio_files),
+        "input_bytes": sum(f.stat().st_size for f in audio_files),
+        "plan": plan.mode,
+        "timings": timings,
+    }
+
+
+def ffmpeg_version() -> str | None:
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-version"], capture_output=True, text=True, check=True
+        )
+        return result.stdout.splitlines()[0]
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark audiobookCombiner on synthetic audio fixtures.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="Write the JSON results to this file (default: stdout).",
+    )
+    parser.add_argument(
+        "-s",
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Scenario to run; repeat for several (default: all).",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=3,
+        help="Timed runs per stage (default: 3).",
+    )
+    parser.add_argument(
+        "--fixtures",
+        default=None,
+        help="Directory to keep generated fixtures in between runs "
+        "(default: a temporary directory that is removed afterwards).",
+    )
+
+    args = parser.parse_args()
+
+    if ffmpeg_version() is None:
+        print("ffmpeg not found. Install it with: brew install ffmpeg")
+        sys.exit(1)
+
+    fixtures_tmp = None if args.fixtures else tempfile.TemporaryDirectory()
+    fixtures = Path(args.fixtures or fixtures_tmp.name)  # type: ignore[union-attr]
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": ffmpeg_version(),
+        "repeat": args.repeat,
+        "startup": bench_startup(args.repeat),
+        "scenarios": {},
+    }
+
+    try:
+        with tempfile.TemporaryDirectory() as out_dir:
+            for name in args.scenario or SCENARIOS:
+                print(f"Running {name}...", file=sys.stderr)
+                setup_start = time.perf_counter()
+                book_dir = build_fixture(name, fixtures)
+                setup_time = time.perf_counter() - setup_start
+                result = bench_scenario(book_dir, Path(out_dir), args.repeat)
+                result["fixture_setup"] = setup_time
+                results["scenarios"][name] = result
+    finally:
+        if fixtures_tmp:
+            fixtures_tmp.cleanup()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            _ = f.write(output + "\n")
+        print(f"Results written to: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
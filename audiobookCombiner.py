@@ -2,25 +2,218 @@
 """
 Audiobook Combiner - Merge multiple audio files into a single audiobook
 Requires: ffmpeg (install via: brew install ffmpeg)
+
+Usage:
+    python audiobookCombiner.py                      # GUI
+    python audiobookCombiner.py BOOK_DIR [OUT.m4b] --title T --author A
+    python audiobookCombiner.py --cli [BOOK_DIR]     # interactive prompts
+    python audiobookCombiner.py --list BOOK_DIR      # show the combine order
+    python audiobookCombiner.py --batch LIBRARY_DIR [OUTPUT_DIR]
+    python audiobookCombiner.py --watch DROP_DIR [OUTPUT_DIR]
+    python audiobookCombiner.py --verify FILE_OR_LIBRARY_DIR...
 """
 
+# Modules only some commands need (csv, hashlib, tempfile, uuid,
+# concurrent.futures, ...) are imported where they are used, so --help,
+# --list and --verify start quickly.
+import json
 import os
+import re
 import sys
 import subprocess
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
+
+AUDIO_EXTENSIONS = {".mp3", ".m4a", ".m4b", ".aac", ".wav", ".flac", ".ogg"}
+MANIFEST_VERSION = 1
+UP_TO_DATE_MESSAGE = "Up to date, skipped"
+# Allowed gap between the output and the summed input durations: encoder
+# priming and frame padding add a little per file, truncation loses a lot
+DURATION_TOLERANCE = 2.0
+DURATION_TOLERANCE_PER_FILE = 0.1
+CHAPTER_FORMATS = (".m4b", ".m4a", ".mp4")
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+COVER_NAMES = ["cover", "folder", "front", "album"]
+CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "audiobookCombiner"
+)
+# Subfolders like "Disc 1", "CD2" or "Part 3" belong to one book
+DISC_DIR_PATTERN = re.compile(r"^(disc|disk|cd|part)\W*\d+", re.IGNORECASE)
+
+# Audio codecs each output container can take with a plain stream copy
+COPY_CODECS = {
+    ".m4b": {"aac", "alac"},
+    ".m4a": {"aac", "alac"},
+    ".mp4": {"aac", "alac", "mp3"},
+    ".mp3": {"mp3"},
+    ".aac": {"aac"},
+    ".flac": {"flac"},
+    ".ogg": {"vorbis", "opus", "flac"},
+}
+# Codec to transcode to when the inputs' codec does not fit the container
+DEFAULT_CODECS = {
+    ".m4b": "aac",
+    ".m4a": "aac",
+    ".mp4": "aac",
+    ".mp3": "mp3",
+    ".aac": "aac",
+    ".flac": "flac",
+    ".ogg": "vorbis",
+}
+# Encoder and intermediate file extension for each target codec
+ENCODERS = {
+    "aac": ("aac", ".m4a"),
+    "alac": ("alac", ".m4a"),
+    "mp3": ("libmp3lame", ".mp3"),
+    "flac": ("flac", ".flac"),
+    "vorbis": ("libvorbis", ".ogg"),
+    "opus": ("libopus", ".ogg"),
+    "pcm_u8": ("pcm_u8", ".wav"),
+    "pcm_s16le": ("pcm_s16le", ".wav"),
+    "pcm_s24le": ("pcm_s24le", ".wav"),
+    "pcm_s32le": ("pcm_s32le", ".wav"),
+    "pcm_f32le": ("pcm_f32le", ".wav"),
+    "pcm_f64le": ("pcm_f64le", ".wav"),
+}
+
+# ffprobe results keyed by (path, size, mtime_ns, chapters)
+_probe_cache: dict[tuple[str, int, int, bool], dict] = {}
+_probe_cache_lock = threading.Lock()
+
+# Serializes the read-merge-write of the on-disk loudness cache
+_loudness_cache_lock = threading.Lock()
+
+# get_audio_files results keyed by (directory, order, recursive), valid
+# while the mtimes of every scanned directory are unchanged
+_audio_files_cache: dict[tuple[str, str, bool], tuple[dict[str, int], list[Path]]] = {}
+
+
+def natural_key(text: str) -> list[int | str]:
+    """Sort key that compares runs of digits as numbers ("2" before "10")"""
+    # re.split with a group alternates text and digits, so types line up.
+    # Go by position: isdigit() is also true for "²", which int() rejects
+    return [
+        int(part) if index % 2 else part.casefold()
+        for index, part in enumerate(re.split(r"(\d+)", text))
+    ]
 
 
-def get_audio_files(directory: str) -> list[Path]:
-    """Get all audio files from directory, sorted naturally"""
-    audio_extensions = {".mp3", ".m4a", ".m4b", ".aac", ".wav", ".flac", ".ogg"}
-    files = [
-        f for f in Path(directory).iterdir() if f.suffix.lower() in audio_extensions
-    ]
-    return sorted(files, key=lambda x: x.name)
+def tag_number(value: str | None) -> int | None:
+    """Parse a track/disc tag such as '3' or '3/12'"""
+    match = re.match(r"\s*(\d+)", value or "")
+    return int(match.group(1)) if match else None
 
 
-def create_file_list(audio_files: list[Path], list_file: str = "filelist.txt") -> str:
-    """Create a text file listing all audio files for ffmpeg concat"""
+def path_key(path: Path, root: Path) -> tuple[list[int | str], ...]:
+    """Natural sort key over every folder below root, then the file name
+
+    "Disc 2/Track 1" sorts before "Disc 10/Track 1" and discs before tracks.
+    """
+    return tuple(natural_key(part) for part in path.relative_to(root).parts)
+
+
+def sort_by_tags(files: list[Path], root: Path) -> list[Path]:
+    """Order files by disc and track tags read in one parallel probe
+
+    Disc folders still come first, so untagged discs do not interleave.
+    Falls back to natural name order unless every file has a track tag.
+    """
+    keys = []
+    for audio_file, probe in zip(files, probe_audio_files(files)):
+        tags = get_tags(probe)
+        track = tag_number(tags.get("track"))
+        if track is None:
+            return sorted(files, key=lambda x: path_key(x, root))
+        disc = tag_number(tags.get("disc") or tags.get("disk")) or 0
+        folder = path_key(audio_file.parent, root) if audio_file.parent != root else ()
+        keys.append((folder, disc, track, natural_key(audio_file.name)))
+    return [f for _, f in sorted(zip(keys, files), key=lambda pair: pair[0])]
+
+
+def scan_audio_files(
+    dir_path: Path, recursive: bool = False
+) -> tuple[list[Path], dict[str, int]]:
+    """List audio files with os.scandir in a single pass
+
+    File types come from the DirEntry (no stat per file); only directories
+    are stat'ed, for their mtimes. Outputs of a previous combine (files
+    with a manifest next to them) and hidden folders are skipped. Folder
+    symlinks are not followed, so a link back up the tree cannot loop.
+
+    Returns:
+        Tuple of (audio_files, {directory: mtime_ns})
+    """
+    files: list[Path] = []
+    dir_mtimes = {str(dir_path): dir_path.stat().st_mtime_ns}
+    pending = [dir_path]
+    while pending:
+        current = pending.pop()
+        with os.scandir(current) as it:
+            entries = list(it)
+        names = {entry.name for entry in entries}
+        for entry in entries:
+            if entry.is_dir():
+                if (
+                    recursive
+                    and not entry.name.startswith(".")
+                    and not entry.is_symlink()
+                ):
+                    dir_mtimes[entry.path] = entry.stat().st_mtime_ns
+                    pending.append(Path(entry.path))
+            elif (
+                os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS
+                and f"{entry.name}.manifest.json" not in names
+            ):
+                files.append(Path(entry.path))
+    return files, dir_mtimes
+
+
+def get_audio_files(
+    directory: str, order: str = "name", recursive: bool = False
+) -> list[Path]:
+    """Get all audio files from directory, sorted naturally
+
+    order is "name" (numeric-aware) or "tags" (disc/track tags). With
+    recursive, nested disc folders are included, ordered disc then track.
+    Results are cached until the mtime of a scanned directory changes.
+    """
+    dir_path = Path(directory).absolute()
+    cache_key = (str(dir_path), order, recursive)
+    cached = _audio_files_cache.get(cache_key)
+    if cached:
+        dir_mtimes, files = cached
+        try:
+            if all(os.stat(d).st_mtime_ns == m for d, m in dir_mtimes.items()):
+                return list(files)
+        except OSError:
+            pass
+
+    files, dir_mtimes = scan_audio_files(dir_path, recursive)
+    if order == "tags":
+        files = sort_by_tags(files, dir_path)
+    else:
+        files = sorted(files, key=lambda x: path_key(x, dir_path))
+
+    _audio_files_cache[cache_key] = (dir_mtimes, files)
+    return list(files)
+
+
+def create_file_list(audio_files: list[Path], list_file: str | None = None) -> str:
+    """Create a text file listing all audio files for ffmpeg concat
+
+    Without list_file a uniquely named temp file is created; the caller
+    removes it.
+    """
+    import tempfile
+
+    if list_file is None:
+        fd, list_file = tempfile.mkstemp(prefix="filelist-", suffix=".txt")
+        os.close(fd)
     with open(list_file, "w") as f:
         for audio_file in audio_files:
             safe_path = str(audio_file.absolute()).replace("'", "'\\''")
@@ -28,35 +221,1046 @@ def create_file_list(audio_files: list[Path], list_file: str = "filelist.txt") -
     return list_file
 
 
-def find_cover_image(directory: str) -> str | None:
-    """Find a cover image in the directory"""
-    image_extensions = {".jpg", ".jpeg", ".png"}
-    common_names = ["cover", "folder", "front", "album"]
+def file_hash(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Compute the SHA-256 of a file's contents"""
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_path(output_file: str) -> Path:
+    """Path of the manifest written next to an output file"""
+    return Path(f"{output_file}.manifest.json")
+
+
+def build_manifest(
+    audio_files: list[Path],
+    options: list[str],
+    cover_image: str | None = None,
+    hash_inputs: bool = False,
+    settings: dict[str, Any] | None = None,
+) -> dict:
+    """Describe the inputs, ffmpeg options and encode settings of an output"""
+
+    def describe(path: Path) -> dict:
+        stat = path.stat()
+        entry = {
+            "path": str(path.absolute()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        if hash_inputs:
+            entry["sha256"] = file_hash(path)
+        return entry
+
+    return {
+        "version": MANIFEST_VERSION,
+        "inputs": [describe(f) for f in audio_files],
+        "cover": describe(Path(cover_image)) if cover_image else None,
+        "options": options,
+        "settings": settings or {},
+    }
+
+
+def read_manifest(output_file: str) -> dict | None:
+    """Load the manifest next to output_file, or None if it is missing"""
+    try:
+        with open(manifest_path(output_file)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_up_to_date(output_file: str, manifest: dict) -> bool:
+    """Check whether output_file was built from exactly this manifest"""
+    if not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+        return False
+    stored = read_manifest(output_file)
+    if stored is None:
+        return False
+    # The expected output section is a result of the build, not an input
+    _ = stored.pop("output", None)
+    return stored == manifest
+
+
+def write_manifest(
+    output_file: str, manifest: dict, expected: dict | None = None
+) -> None:
+    """Atomically write the manifest next to output_file
+
+    expected (duration, chapters, audio streams) is stored so that the
+    output can be verified later without its inputs.
+    """
+    path = manifest_path(output_file)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({**manifest, "output": expected}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def probe_audio(path: Path, chapters: bool = False) -> dict:
+    """Read container and stream info for a file with ffprobe (no decoding)
+
+    With chapters the chapter list is read too. Results are cached until
+    the file's size or mtime changes.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {}
+    key = (str(Path(path).absolute()), stat.st_size, stat.st_mtime_ns, chapters)
+    with _probe_cache_lock:
+        if key in _probe_cache:
+            return _probe_cache[key]
+
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        *(["-show_chapters"] if chapters else []),
+        str(path),
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        probe = json.loads(result.stdout)
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+        return {}
+
+    with _probe_cache_lock:
+        _probe_cache[key] = probe
+    return probe
+
+
+def probe_audio_files(audio_files: list[Path]) -> list[dict]:
+    """Probe many files concurrently, in input order"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor() as pool:
+        return list(pool.map(probe_audio, audio_files))
+
+
+def get_duration(probe: dict) -> float | None:
+    """Duration in seconds from a probe_audio result"""
+    try:
+        return float(probe["format"]["duration"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def total_duration(audio_files: list[Path]) -> float | None:
+    """Sum of the input durations, or None if any file cannot be probed"""
+    total = 0.0
+    for probe in probe_audio_files(audio_files):
+        duration = get_duration(probe)
+        if duration is None:
+            return None
+        total += duration
+    return total
+
+
+def last_packet_time(path: Path, start: float) -> float | None:
+    """Timestamp of the last audio packet, reading only from start onwards
+
+    Packets are demuxed, not decoded. A file cut short after its header was
+    written (an MP3 with a Xing frame count, say) reports its full duration
+    but has no packets near the end; that case returns 0.0. Returns None if
+    ffprobe cannot be run.
+    """
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "a:0",
+        "-read_intervals",
+        f"{max(start, 0.0):.3f}%",
+        "-show_entries",
+        "packet=pts_time",
+        "-of",
+        "csv=p=0",
+        str(path),
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0:
+        return None
+    times = []
+    for line in result.stdout.split():
+        try:
+            times.append(float(line.strip(",")))
+        except ValueError:
+            continue
+    return max(times, default=0.0)
+
+
+def verify_audiobook(
+    output_file: str,
+    expected_duration: float | None = None,
+    expected_chapters: int | None = None,
+    input_count: int = 1,
+) -> tuple[bool, str]:
+    """Check a combined file with a container probe, without decoding it
+
+    The duration must match expected_duration (within DURATION_TOLERANCE
+    plus DURATION_TOLERANCE_PER_FILE per input), there must be exactly one
+    audio stream, and the chapter count must match expected_chapters. Every
+    chapter must end within the file, and the last seconds of audio must be
+    present. Unknown expectations are skipped.
+
+    Returns:
+        Tuple of (ok_flag, message listing the problems found)
+    """
+    if not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+        return False, "missing or empty"
+    probe = probe_audio(Path(output_file), chapters=True)
+    if not probe:
+        return False, "ffprobe could not read the file"
+
+    problems = []
+    duration = get_duration(probe)
+    tolerance = DURATION_TOLERANCE + DURATION_TOLERANCE_PER_FILE * input_count
+    audio_streams = [
+        s for s in probe.get("streams", []) if s.get("codec_type") == "audio"
+    ]
+    if len(audio_streams) != 1:
+        problems.append(f"{len(audio_streams)} audio streams, expected 1")
+
+    if duration is None or duration <= 0:
+        problems.append("no duration")
+    elif expected_duration is not None:
+        if abs(duration - expected_duration) > tolerance:
+            problems.append(
+                f"duration {duration:.1f}s, expected {expected_duration:.1f}s"
+            )
+
+    if duration and duration > 0:
+        last = last_packet_time(Path(output_file), duration - tolerance)
+        if last is not None and last < duration - tolerance:
+            problems.append(f"audio ends at {last:.1f}s of {duration:.1f}s")
+
+    chapter_list = probe.get("chapters", [])
+    if expected_chapters is not None and len(chapter_list) != expected_chapters:
+        problems.append(f"{len(chapter_list)} chapters, expected {expected_chapters}")
+    if duration and chapter_list:
+        try:
+            last_end = max(float(c["end_time"]) for c in chapter_list)
+        except (KeyError, ValueError):
+            last_end = 0.0
+        if last_end > duration + tolerance:
+            problems.append(f"chapters run to {last_end:.1f}s, past the end")
+
+    if problems:
+        return False, "; ".join(problems)
+    return True, f"{duration:.1f}s, {len(chapter_list)} chapters"
+
+
+def verify_outputs(paths: list[str]) -> list[tuple[str, bool, str]]:
+    """Verify combined files, or every manifest-described file under folders
+
+    Expectations come from the manifest written at build time, so the
+    inputs do not need to be present.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    outputs: list[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            outputs.extend(
+                str(manifest)[: -len(".manifest.json")]
+                for manifest in sorted(Path(path).rglob("*.manifest.json"))
+            )
+        else:
+            outputs.append(path)
+
+    def check(output_file: str) -> tuple[str, bool, str]:
+        manifest = read_manifest(output_file) or {}
+        expected = manifest.get("output") or {}
+        ok, message = verify_audiobook(
+            output_file,
+            expected.get("duration"),
+            expected.get("chapters"),
+            len(manifest.get("inputs", [])) or 1,
+        )
+        return output_file, ok, message
 
-    dir_path = Path(directory)
+    with ThreadPoolExecutor() as pool:
+        return list(pool.map(check, outputs))
 
-    # First, look for common cover image names
-    for name in common_names:
-        for ext in image_extensions:
-            for path in dir_path.glob(f"{name}*{ext}"):
-                return str(path.absolute())
-            for path in dir_path.glob(f"{name.upper()}*{ext}"):
-                return str(path.absolute())
 
-    # If not found, just return the first image file
-    for ext in image_extensions:
-        images = list(dir_path.glob(f"*{ext}"))
-        if images:
-            return str(images[0].absolute())
+def get_tags(probe: dict) -> dict[str, str]:
+    """Container and first-stream tags with lowercase keys"""
+    tags: dict[str, str] = {}
+    for stream in probe.get("streams", [])[:1]:
+        tags.update(stream.get("tags", {}))
+    tags.update(probe.get("format", {}).get("tags", {}))
+    return {key.lower(): value for key, value in tags.items()}
 
+
+def escape_ffmetadata(value: str) -> str:
+    """Escape special characters for an ffmpeg metadata file"""
+    return re.sub(r"([=;#\\\n])", r"\\\1", value)
+
+
+def create_chapter_file(audio_files: list[Path], chapter_file: str) -> int:
+    """Write an ffmpeg metadata file with one chapter per source file
+
+    Chapter boundaries are the running sum of the probed durations and
+    titles come from each file's title tag, falling back to its name.
+    Returns the number of chapters written (0 if any file could not be
+    probed, in which case the file holds no chapters).
+    """
+    probes = probe_audio_files(audio_files)
+    durations = [get_duration(probe) for probe in probes]
+
+    lines = [";FFMETADATA1"]
+    if None not in durations:
+        elapsed = 0.0
+        for audio_file, probe, duration in zip(audio_files, probes, durations):
+            title = get_tags(probe).get("title") or audio_file.stem
+            start = round(elapsed * 1000)
+            elapsed += duration
+            lines.extend(
+                [
+                    "[CHAPTER]",
+                    "TIMEBASE=1/1000",
+                    f"START={start}",
+                    f"END={round(elapsed * 1000)}",
+                    f"title={escape_ffmetadata(title)}",
+                ]
+            )
+
+    with open(chapter_file, "w") as f:
+        _ = f.write("\n".join(lines) + "\n")
+    return 0 if None in durations else len(audio_files)
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    """The stream parameters that must match for a concat stream copy"""
+
+    codec: str
+    sample_rate: int
+    channels: int
+
+    def __str__(self) -> str:
+        return f"{self.codec} {self.sample_rate} Hz {self.channels}ch"
+
+
+def get_audio_format(probe: dict) -> AudioFormat | None:
+    """Format of the first audio stream in a probe_audio result"""
+    for stream in probe.get("streams", []):
+        if stream.get("codec_type") == "audio":
+            try:
+                return AudioFormat(
+                    stream["codec_name"],
+                    int(stream["sample_rate"]),
+                    int(stream["channels"]),
+                )
+            except (KeyError, ValueError):
+                return None
     return None
 
 
+@dataclass
+class CombinePlan:
+    """How the inputs will be joined: stream copy or partial transcode"""
+
+    mode: str  # "copy" or "transcode"
+    reason: str
+    target: AudioFormat | None = None
+    transcode: list[Path] = field(default_factory=list)
+
+
+def plan_combine(
+    audio_files: list[Path], output_file: str, force_transcode: bool = False
+) -> CombinePlan:
+    """Decide whether the inputs can be concatenated with a stream copy
+
+    Every input is probed for codec, sample rate and channel count. If all
+    match (and the codec fits the output container) the zero-copy path is
+    kept; otherwise only the files that differ from the most common format
+    are transcoded to it. force_transcode re-encodes every input to the
+    container's default codec (AAC for M4B).
+    """
+    formats = [get_audio_format(probe) for probe in probe_audio_files(audio_files)]
+    unknown = [f.name for f, fmt in zip(audio_files, formats) if fmt is None]
+    if unknown:
+        return CombinePlan(
+            "copy", f"could not probe {len(unknown)} file(s), using stream copy"
+        )
+
+    # Ties go to the format that appears first
+    reference = Counter(formats).most_common(1)[0][0]
+    suffix = Path(output_file).suffix.lower()
+
+    if force_transcode:
+        target = AudioFormat(
+            DEFAULT_CODECS.get(suffix, reference.codec),
+            reference.sample_rate,
+            reference.channels,
+        )
+        return CombinePlan(
+            "transcode",
+            f"transcode requested, encoding all {len(audio_files)} files to {target}",
+            target,
+            list(audio_files),
+        )
+
+    allowed = COPY_CODECS.get(suffix)
+    if allowed is not None and reference.codec not in allowed:
+        target = AudioFormat(
+            DEFAULT_CODECS[suffix], reference.sample_rate, reference.channels
+        )
+        # Inputs that already match the target can still be copied
+        convert = [f for f, fmt in zip(audio_files, formats) if fmt != target]
+        return CombinePlan(
+            "transcode",
+            f"{reference.codec} cannot be stream-copied into {suffix}, "
+            f"transcoding {len(convert)} of {len(audio_files)} files to {target}",
+            target,
+            convert,
+        )
+
+    odd = [f for f, fmt in zip(audio_files, formats) if fmt != reference]
+    if not odd:
+        return CombinePlan(
+            "copy", f"all {len(audio_files)} inputs are {reference}", reference
+        )
+
+    names = ", ".join(f.name for f in odd[:3]) + (", ..." if len(odd) > 3 else "")
+    return CombinePlan(
+        "transcode",
+        f"{len(odd)} of {len(audio_files)} inputs differ from {reference} "
+        f"({names}), transcoding only those",
+        reference,
+        odd,
+    )
+
+
+def transcode_file(
+    source: Path,
+    dest: Path,
+    target: AudioFormat,
+    bitrate: str | None = None,
+    audio_filter: str | None = None,
+) -> None:
+    """Transcode the audio of one file to the target format"""
+    encoder, _ = ENCODERS[target.codec]
+    # One encoder thread per job: parallelism comes from running many jobs
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-v",
+        "error",
+        "-i",
+        str(source),
+        "-map",
+        "0:a:0",
+        "-threads",
+        "1",
+        "-c:a",
+        encoder,
+        "-ar",
+        str(target.sample_rate),
+        "-ac",
+        str(target.channels),
+    ]
+    if bitrate:
+        cmd.extend(["-b:a", bitrate])
+    if audio_filter:
+        cmd.extend(["-af", audio_filter])
+    cmd.append(str(dest))
+    result = subprocess.run(
+        cmd, capture_output=True, text=True, stdin=subprocess.DEVNULL
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Transcoding {source.name} failed:\n{result.stderr}")
+
+
+def transcode_files(
+    audio_files: list[Path],
+    target: AudioFormat,
+    work_dir: str,
+    workers: int | None = None,
+    bitrate: str | None = None,
+    on_done: Callable[[int, int], None] | None = None,
+    filters: dict[Path, str] | None = None,
+) -> dict[Path, Path]:
+    """Transcode files to the target format in parallel
+
+    Each file is a separate ffmpeg process, so `workers` jobs keep that many
+    cores busy. on_done is called with (finished, total) as files complete,
+    and filters maps a source file to its own audio filter.
+
+    Returns a mapping of each source file to its intermediate copy.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    if target.codec not in ENCODERS:
+        raise RuntimeError(f"No encoder available to transcode to {target}")
+    _, extension = ENCODERS[target.codec]
+    outputs = {
+        source: Path(work_dir) / f"{index:05d}{extension}"
+        for index, source in enumerate(audio_files)
+    }
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [
+            pool.submit(
+                transcode_file,
+                source,
+                dest,
+                target,
+                bitrate,
+                (filters or {}).get(source),
+            )
+            for source, dest in outputs.items()
+        ]
+        for finished, future in enumerate(as_completed(futures), start=1):
+            future.result()
+            if on_done:
+                on_done(finished, len(futures))
+    return outputs
+
+
+def measure_loudness(audio_file: Path) -> dict[str, str] | None:
+    """First loudnorm pass: measure integrated loudness, true peak and LRA
+
+    The input_* measurements do not depend on the target, so they can be
+    reused for any target loudness.
+    """
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-nostats",
+        "-i",
+        str(audio_file),
+        "-map",
+        "0:a:0",
+        "-af",
+        "loudnorm=print_format=json",
+        "-f",
+        "null",
+        "-",
+    ]
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, stdin=subprocess.DEVNULL
+        )
+    except FileNotFoundError:
+        return None
+    # The JSON report is the last {...} block on stderr
+    start, end = result.stderr.rfind("{"), result.stderr.rfind("}")
+    if result.returncode != 0 or start < 0 or end < start:
+        return None
+    try:
+        report = json.loads(result.stderr[start : end + 1])
+    except ValueError:
+        return None
+    keys = ("input_i", "input_tp", "input_lra", "input_thresh")
+    if any(report.get(key) in (None, "-inf", "inf") for key in keys):
+        return None  # silence cannot be normalized
+    return {key: report[key] for key in keys}
+
+
+def measure_loudness_files(
+    audio_files: list[Path], workers: int | None = None
+) -> list[dict[str, str] | None]:
+    """Measure many files in parallel, cached on disk by content hash
+
+    Re-running a combine, or changing the target loudness, only analyzes
+    files whose contents have not been measured before.
+    """
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache_file = CACHE_DIR / "loudness.json"
+
+    def read_cache() -> dict[str, dict[str, str]]:
+        try:
+            with open(cache_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    cache = read_cache()
+    measurements: dict[str, dict[str, str]] = {}
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        hashes = list(pool.map(file_hash, audio_files))
+        todo = {
+            digest: audio_file
+            for digest, audio_file in zip(hashes, audio_files)
+            if digest not in cache
+        }
+        for digest, measured in zip(todo, pool.map(measure_loudness, todo.values())):
+            if measured:
+                measurements[digest] = measured
+
+    if measurements:
+        # Merge into the current file so concurrent combines keep each
+        # other's entries
+        with _loudness_cache_lock:
+            cache = read_cache()
+            cache.update(measurements)
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=f".{cache_file.name}-", dir=cache_file.parent
+            )
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(cache, f)
+                os.replace(tmp_path, cache_file)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+    return [cache.get(digest) for digest in hashes]
+
+
+def loudnorm_filter(measured: dict[str, str], target_lufs: float) -> str:
+    """Second loudnorm pass: linear gain using the cached measurements"""
+    return (
+        f"loudnorm=I={target_lufs}:TP=-1.5:LRA=11"
+        f":measured_I={measured['input_i']}"
+        f":measured_TP={measured['input_tp']}"
+        f":measured_LRA={measured['input_lra']}"
+        f":measured_thresh={measured['input_thresh']}"
+        ":linear=true"
+    )
+
+
+@dataclass
+class FFmpegProgress:
+    """A snapshot of a running ffmpeg job"""
+
+    out_time: float  # seconds of output written so far
+    total: float | None  # expected output duration in seconds
+    elapsed: float  # wall-clock seconds since the job started
+    done: bool = False
+
+    @property
+    def percent(self) -> float | None:
+        if not self.total:
+            return None
+        return min(100.0, 100.0 * self.out_time / self.total)
+
+    @property
+    def speed(self) -> float | None:
+        """Throughput as a multiple of realtime"""
+        if self.elapsed <= 0:
+            return None
+        return self.out_time / self.elapsed
+
+    @property
+    def eta(self) -> float | None:
+        """Estimated seconds remaining"""
+        speed = self.speed
+        if not self.total or not speed:
+            return None
+        return max(0.0, (self.total - self.out_time) / speed)
+
+
+def format_progress(progress: FFmpegProgress) -> str:
+    """One-line human readable progress summary"""
+
+    def clock(seconds: float) -> str:
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+    parts = []
+    if progress.percent is not None:
+        parts.append(f"{progress.percent:5.1f}%")
+    else:
+        parts.append(clock(progress.out_time))
+    if progress.speed is not None:
+        parts.append(f"{progress.speed:.1f}x realtime")
+    if progress.done:
+        parts.append(f"done in {clock(progress.elapsed)}")
+    elif progress.eta is not None:
+        parts.append(f"ETA {clock(progress.eta)}")
+    return " | ".join(parts)
+
+
+class FFmpegRun:
+    """Run an ffmpeg command and iterate over its -progress reports
+
+    stderr is drained on a background thread and only the tail is kept,
+    so long jobs do not accumulate their whole log in memory. Stopping the
+    iteration early (break, or closing it) kills ffmpeg.
+    """
+
+    def __init__(self, cmd: list[str], total: float | None = None, tail: int = 50):
+        self.cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+        self.total = total
+        self.returncode: int | None = None
+        self._stderr: deque[str] = deque(maxlen=tail)
+
+    @property
+    def stderr(self) -> str:
+        return "".join(self._stderr)
+
+    def __iter__(self) -> Iterator[FFmpegProgress]:
+        start = time.monotonic()
+        process = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        assert process.stdout is not None and process.stderr is not None
+        drain = threading.Thread(
+            target=self._stderr.extend, args=(process.stderr,), daemon=True
+        )
+        drain.start()
+
+        out_time = 0.0
+        try:
+            for line in process.stdout:
+                key, _, value = line.strip().partition("=")
+                if key in ("out_time_us", "out_time_ms") and value.isdigit():
+                    # Both keys are reported in microseconds
+                    out_time = int(value) / 1_000_000
+                elif key == "progress":
+                    yield FFmpegProgress(
+                        out_time,
+                        self.total,
+                        time.monotonic() - start,
+                        done=value == "end",
+                    )
+        except GeneratorExit:
+            # Stopped early: nothing reads stdout any more, so ffmpeg would
+            # block on a full pipe and never exit
+            process.kill()
+            raise
+        finally:
+            self.returncode = process.wait()
+            drain.join()
+
+
+def print_progress(progress: FFmpegProgress) -> None:
+    """Progress callback that redraws a single terminal line"""
+    end = "\n" if progress.done else ""
+    print(f"\r  {format_progress(progress):<60}", end=end, flush=True)
+
+
+def image_dimensions(path: str) -> tuple[int, int] | None:
+    """Read (width, height) from a PNG or JPEG header without decoding"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(24)
+            if header.startswith(b"\x89PNG\r\n\x1a\n") and header[12:16] == b"IHDR":
+                return (
+                    int.from_bytes(header[16:20], "big"),
+                    int.from_bytes(header[20:24], "big"),
+                )
+            if not header.startswith(b"\xff\xd8"):
+                return None
+
+            # Walk the JPEG segments until a start-of-frame marker
+            f.seek(2)
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    return None
+                if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+                    continue  # standalone markers carry no length
+                length_bytes = f.read(2)
+                length = int.from_bytes(length_bytes, "big")
+                if len(length_bytes) < 2 or length < 2:
+                    return None  # truncated or corrupt segment
+                if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+                    frame = f.read(5)
+                    if len(frame) < 5:
+                        return None
+                    return (
+                        int.from_bytes(frame[3:5], "big"),
+                        int.from_bytes(frame[1:3], "big"),
+                    )
+                f.seek(length - 2, os.SEEK_CUR)
+    except OSError:
+        return None
+
+
+# ffmpeg filters that apply each EXIF Orientation value
+ORIENTATION_FILTERS = {
+    2: "hflip",
+    3: "hflip,vflip",
+    4: "vflip",
+    5: "transpose=0",
+    6: "transpose=1",
+    7: "transpose=3",
+    8: "transpose=2",
+}
+
+
+def jpeg_orientation(path: str) -> int:
+    """Read the EXIF Orientation tag of a JPEG (1, upright, if it has none)"""
+    try:
+        with open(path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return 1
+            while True:
+                marker = f.read(2)
+                length_bytes = f.read(2)
+                length = int.from_bytes(length_bytes, "big")
+                if len(marker) < 2 or marker[0] != 0xFF or marker[1] == 0xDA:
+                    return 1
+                if len(length_bytes) < 2 or length < 2:
+                    return 1
+                segment = f.read(length - 2)
+                if marker[1] == 0xE1 and segment.startswith(b"Exif\0\0"):
+                    break
+    except OSError:
+        return 1
+
+    # TIFF header, then IFD0: a count and 12-byte (tag, type, count, value) entries
+    tiff = segment[6:]
+    order = "little" if tiff[:2] == b"II" else "big"
+    ifd = int.from_bytes(tiff[4:8], order)
+    count = int.from_bytes(tiff[ifd : ifd + 2], order)
+    for index in range(count):
+        entry = tiff[ifd + 2 + index * 12 : ifd + 14 + index * 12]
+        if len(entry) == 12 and int.from_bytes(entry[:2], order) == 0x0112:
+            return int.from_bytes(entry[8:10], order) or 1
+    return 1
+
+
+def strip_jpeg_metadata(source: str, dest: str) -> bool:
+    """Copy a JPEG without its EXIF/XMP/comment segments, losslessly
+
+    The ICC profile (APP2) and Adobe colour transform (APP14) are kept, as
+    they change how the image decodes. Callers should only strip upright
+    images, since the EXIF Orientation tag goes too (see jpeg_orientation).
+    Returns False if the file is not a JPEG this parser understands.
+    """
+    with open(source, "rb") as f:
+        data = f.read()
+    if not data.startswith(b"\xff\xd8"):
+        return False
+
+    kept = [b"\xff\xd8"]
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return False
+        marker = data[pos + 1]
+        if marker == 0xDA:  # start of scan: the rest is image data
+            kept.append(data[pos:])
+            break
+        length = int.from_bytes(data[pos + 2 : pos + 4], "big")
+        segment = data[pos : pos + 2 + length]
+        # Drop APP1-APP15 (EXIF, XMP, ...) and COM; keep APP0 (JFIF),
+        # APP2 (ICC profile) and APP14 (Adobe)
+        if marker in (0xE2, 0xEE) or not (0xE1 <= marker <= 0xEF or marker == 0xFE):
+            kept.append(segment)
+        pos += 2 + length
+    else:
+        return False
+
+    with open(dest, "wb") as f:
+        _ = f.write(b"".join(kept))
+    return True
+
+
+def prepare_cover(cover_image: str, max_size: int = 1400) -> str:
+    """Normalize a cover for muxing and cache the result by content hash
+
+    The image is shrunk to fit max_size x max_size and stripped of
+    metadata. JPEG is kept (a JPEG that already fits is copied without
+    re-encoding); other images become JPEG unless they are PNGs with an
+    alpha channel. Falls back to the original path if processing fails.
+    """
+    import tempfile
+
+    with open(cover_image, "rb") as f:
+        header = f.read(26)
+    is_jpeg = header.startswith(b"\xff\xd8")
+    # PNG colour types 4 and 6 carry alpha
+    keep_png = (
+        header.startswith(b"\x89PNG") and len(header) > 25 and header[25] in (4, 6)
+    )
+
+    extension = ".png" if keep_png else ".jpg"
+    digest = file_hash(Path(cover_image))[:32]
+    cover_path = CACHE_DIR / "covers" / f"{digest}-{max_size}{extension}"
+    if cover_path.exists():
+        return str(cover_path)
+
+    cover_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{cover_path.stem}-", suffix=extension, dir=cover_path.parent
+    )
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    width, height = image_dimensions(cover_image) or (max_size + 1, max_size + 1)
+    # A rotated JPEG is re-encoded upright, as stripping drops the EXIF tag
+    orientation = jpeg_orientation(cover_image) if is_jpeg else 1
+    try:
+        if is_jpeg and orientation == 1 and max(width, height) <= max_size:
+            if not strip_jpeg_metadata(cover_image, str(tmp_path)):
+                return cover_image
+        else:
+            scale = (
+                f"scale='min({max_size},iw)':'min({max_size},ih)'"
+                ":force_original_aspect_ratio=decrease"
+            )
+            if orientation in ORIENTATION_FILTERS:
+                scale = f"{ORIENTATION_FILTERS[orientation]},{scale}"
+            # Rotate explicitly; only some ffmpeg versions honour the tag
+            cmd = ["ffmpeg", "-y", "-v", "error", "-noautorotate", "-i", cover_image]
+            cmd.extend(["-frames:v", "1", "-vf", scale, "-map_metadata", "-1"])
+            if keep_png:
+                cmd.extend(["-c:v", "png"])
+            else:
+                cmd.extend(["-c:v", "mjpeg", "-q:v", "2", "-pix_fmt", "yuvj420p"])
+            cmd.extend(["-f", "image2", str(tmp_path)])
+            result = subprocess.run(cmd, capture_output=True, stdin=subprocess.DEVNULL)
+            if result.returncode != 0 or tmp_path.stat().st_size == 0:
+                return cover_image
+        os.replace(tmp_path, cover_path)
+    except OSError:
+        return cover_image
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return str(cover_path)
+
+
+def extract_embedded_cover(audio_file: Path) -> str | None:
+    """Extract the attached picture of an audio file into the cache
+
+    The extracted image is keyed by the audio file's path, size and mtime,
+    so repeated lookups reuse it.
+    """
+    import hashlib
+    import tempfile
+
+    probe = probe_audio(audio_file)
+    pictures = [
+        stream
+        for stream in probe.get("streams", [])
+        if stream.get("disposition", {}).get("attached_pic")
+    ]
+    if not pictures:
+        return None
+
+    extension = ".png" if pictures[0].get("codec_name") == "png" else ".jpg"
+    stat = audio_file.stat()
+    key = hashlib.sha256(
+        f"{audio_file.absolute()}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+    ).hexdigest()[:16]
+    cover_path = CACHE_DIR / "embedded" / f"{key}{extension}"
+    if cover_path.exists():
+        return str(cover_path)
+
+    # Extract under a unique name so a failed or concurrent run never
+    # leaves a partial image at cover_path
+    cover_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{cover_path.stem}-", suffix=extension, dir=cover_path.parent
+    )
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-v",
+        "error",
+        "-i",
+        str(audio_file),
+        "-map",
+        f"0:{pictures[0]['index']}",
+        "-c",
+        "copy",
+        "-frames:v",
+        "1",
+        str(tmp_path),
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, stdin=subprocess.DEVNULL)
+        if result.returncode != 0 or tmp_path.stat().st_size == 0:
+            return None
+        os.replace(tmp_path, cover_path)
+    except OSError:  # includes ffmpeg not being installed
+        return None
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return str(cover_path)
+
+
+def find_cover_image(directory: str, check_embedded: bool = False) -> str | None:
+    """Find a cover image in the directory with a single scan
+
+    Candidates are ranked by name ("cover" > "folder" > "front" > "album",
+    case-insensitive, then any other image), then by pixel count and file
+    size. With check_embedded, artwork embedded in the first audio file is
+    used when no image has a cover-like name.
+    """
+    candidates = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            stem, extension = os.path.splitext(entry.name)
+            if extension.lower() not in IMAGE_EXTENSIONS or not entry.is_file():
+                continue
+            rank = next(
+                (
+                    i
+                    for i, name in enumerate(COVER_NAMES)
+                    if stem.lower().startswith(name)
+                ),
+                len(COVER_NAMES),
+            )
+            candidates.append((rank, entry.stat().st_size, entry.path))
+
+    best_rank = min((rank for rank, _, _ in candidates), default=len(COVER_NAMES))
+    if best_rank == len(COVER_NAMES) and check_embedded:
+        audio_files = get_audio_files(directory, recursive=True)
+        if audio_files:
+            embedded = extract_embedded_cover(audio_files[0])
+            if embedded:
+                return embedded
+
+    # Only the best-named candidates need their headers read
+    def score(candidate: tuple[int, int, str]) -> tuple[int, int, str]:
+        _, size, path = candidate
+        width, height = image_dimensions(path) or (0, 0)
+        return (-width * height, -size, path)
+
+    best = [c for c in candidates if c[0] == best_rank]
+    if not best:
+        return None
+    return str(Path(min(best, key=score)[2]).absolute())
+
+
 def combine_audiobook(
     input_dir: str,
     output_file: str,
     metadata: dict[str, str] | None = None,
     cover_image: str | None = None,
+    verbose: bool = True,
+    incremental: bool = True,
+    hash_inputs: bool = False,
+    progress_callback: Callable[[FFmpegProgress], None] | None = None,
+    chapters: bool = True,
+    workers: int | None = None,
+    transcode: bool = False,
+    bitrate: str | None = None,
+    order: str = "name",
+    recursive: bool = False,
+    cover_max_size: int | None = 1400,
+    normalize: bool = False,
+    target_lufs: float = -16.0,
 ) -> tuple[bool, str]:
     """Combine audio files into a single audiobook
 
@@ -65,36 +1269,83 @@ def combine_audiobook(
         output_file: Path where the combined audiobook will be saved
         metadata: Optional dictionary with keys like 'title', 'author', 'album'
         cover_image: Optional path to cover image file
+        verbose: Print progress details to stdout
+        incremental: Skip the rebuild when the manifest next to the output
+            shows that no input or option changed
+        hash_inputs: Also record (and compare) a SHA-256 of every input
+        progress_callback: Called with an FFmpegProgress for every ffmpeg
+            progress report (percent done, x realtime, ETA)
+        chapters: Add one chapter per source file (M4B/M4A/MP4 outputs)
+        workers: Parallel transcodes when inputs need converting
+            (default: CPU count)
+        transcode: Re-encode every input (to AAC for M4B) on `workers`
+            parallel ffmpeg jobs, then join the segments with a stream copy
+        bitrate: Encoder bitrate for transcoded files, e.g. '64k'
+        order: Input order, "name" (numeric-aware) or "tags" (disc/track)
+        recursive: Include audio in nested folders such as "Disc 1/"
+        cover_max_size: Shrink the cover to fit this many pixels, strip its
+            metadata and cache the result (None attaches it unchanged)
+        normalize: Level every input to target_lufs (EBU R128) before joining.
+            Implies transcoding; the loudness analysis is cached per file
+        target_lufs: Integrated loudness target for normalize
 
     Returns:
         Tuple of (success_flag, message)
     """
-    """Combine audio files into a single audiobook"""
+    import shutil
+    import uuid
 
-    # Get all audio files
-    audio_files = get_audio_files(input_dir)
+    log = print if verbose else lambda *args, **kwargs: None
+
+    # Get all audio files, skipping a previous output in the same folder
+    output_path = Path(output_file).absolute()
+    audio_files = [
+        f
+        for f in get_audio_files(input_dir, order, recursive)
+        if f.absolute() != output_path
+    ]
 
     if not audio_files:
         return False, "No audio files found in directory"
 
-    print(f"\nFound {len(audio_files)} audio files:")
+    log(f"\nFound {len(audio_files)} audio files:")
     for f in audio_files:
-        print(f"  - {f.name}")
-
-    # Create file list for ffmpeg
-    list_file = create_file_list(audio_files)
-
-    # Build ffmpeg command
-    cmd = ["ffmpeg", "-f", "concat", "-safe", "0", "-i", list_file]
+        log(f"  - {f.relative_to(Path(input_dir).absolute())}")
+
+    # Per-job work folder next to the output for the concat list, chapters
+    # and transcoded files. Its random name keeps concurrent combines from
+    # sharing files; it is created after the up-to-date check and removed
+    # however the combine ends.
+    work_dir = output_path.parent / f".audiobook-{uuid.uuid4().hex}"
+    list_file = str(work_dir / "filelist.txt")
+    chapter_file = str(work_dir / "chapters.txt")
+    work_files = [list_file, chapter_file]
+
+    if cover_image and not os.path.exists(cover_image):
+        cover_image = None
+
+    # Attach a small, metadata-free copy of the cover, reused across runs
+    source_cover = cover_image
+    if cover_image and cover_max_size:
+        cover_image = prepare_cover(cover_image, cover_max_size)
+    add_chapters = chapters and output_file.lower().endswith(CHAPTER_FORMATS)
+
+    # Build ffmpeg command (-y: never block on an overwrite prompt).
+    # All inputs go first so later options apply to the output.
+    cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_file]
+    if cover_image:
+        cmd.extend(["-i", cover_image])
+    if add_chapters:
+        cmd.extend(["-i", chapter_file])
 
     # Add cover image if provided
-    if cover_image and os.path.exists(cover_image):
-        print(f"Adding cover image: {Path(cover_image).name}")
-        cmd.extend(["-i", cover_image])
+    if cover_image:
+        log(f"Adding cover image: {Path(cover_image).name}")
         cmd.extend(["-map", "0:a", "-map", "1:v", "-c:a", "copy"])
 
-        # For M4B/M4A files, use AAC video codec for cover
-        if output_file.lower().endswith((".m4b", ".m4a")):
+        # For M4B/M4A files, use AAC video codec for cover. A prepared
+        # cover is already a JPEG or PNG that MP4 can carry as-is.
+        if output_file.lower().endswith((".m4b", ".m4a")) and not cover_max_size:
             cmd.extend(["-c:v", "png"])  # Keep as PNG for M4B
         else:
             cmd.extend(["-c:v", "copy"])
@@ -103,6 +1354,10 @@ def combine_audiobook(
     else:
         cmd.extend(["-c", "copy"])
 
+    # Chapters come from the metadata file, the last input
+    if add_chapters:
+        cmd.extend(["-map_chapters", "2" if cover_image else "1"])
+
     # Add metadata if provided
     if metadata:
         if metadata.get("title"):
@@ -114,49 +1369,478 @@ def combine_audiobook(
 
     cmd.append(output_file)
 
-    print(f"\nCombining into: {output_file}")
-    print("Processing...")
-    print(f"\nRunning command: {' '.join(cmd)}\n")
+    # Compare against the manifest of the previous build
+    options = [arg for arg in cmd[1:-1] if arg not in work_files]
+    settings = {
+        "transcode": transcode,
+        "bitrate": bitrate,
+        "normalize": normalize,
+        "target_lufs": target_lufs if normalize else None,
+    }
+    manifest = build_manifest(audio_files, options, source_cover, hash_inputs, settings)
+    if incremental and is_up_to_date(output_file, manifest):
+        return True, f"{UP_TO_DATE_MESSAGE}: {output_file}"
+    if manifest_path(output_file).exists():
+        os.remove(manifest_path(output_file))
+
+    work_dir.mkdir(parents=True)
 
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        # Stream copy when the inputs allow it, otherwise convert the odd ones
+        plan = plan_combine(audio_files, output_file, transcode or normalize)
+        log(f"\nPlan: {plan.mode} ({plan.reason})")
+        concat_files = audio_files
+
+        # Loudness normalization filters every file during the transcode
+        filters: dict[Path, str] = {}
+        if normalize and plan.mode == "transcode":
+            log(f"Measuring loudness of {len(audio_files)} file(s)...")
+            measurements = measure_loudness_files(audio_files, workers)
+            for audio_file, measured in zip(audio_files, measurements):
+                if measured:
+                    filters[audio_file] = loudnorm_filter(measured, target_lufs)
+                else:
+                    log(f"  Could not measure {audio_file.name}, left as is")
+
+        if plan.mode == "transcode" and plan.target:
+            log(f"Transcoding {len(plan.transcode)} file(s) to {plan.target}...")
+            converted = transcode_files(
+                plan.transcode,
+                plan.target,
+                str(work_dir),
+                workers,
+                bitrate,
+                on_done=lambda done, total: log(
+                    f"\r  Transcoded {done}/{total}", end="\n" if done == total else ""
+                ),
+                filters=filters,
+            )
+            concat_files = [converted.get(f, f) for f in audio_files]
+
+        # Create file list for ffmpeg
+        create_file_list(concat_files, list_file)
+
+        count = None
+        if add_chapters:
+            count = create_chapter_file(audio_files, chapter_file)
+            log(f"Adding {count} chapter markers")
+
+        # The total duration turns ffmpeg's output position into a
+        # percentage and is what the output is verified against
+        total = total_duration(audio_files)
+
+        log(f"\nCombining into: {output_file}")
+        log("Processing...")
+        log(f"\nRunning command: {' '.join(cmd)}\n")
+
+        result = FFmpegRun(cmd, total)
+        for progress in result:
+            if progress_callback:
+                progress_callback(progress)
 
         # Check if output file was actually created and has content
         if not os.path.exists(output_file):
-            if os.path.exists(list_file):
-                os.remove(list_file)
             return False, f"Output file was not created. ffmpeg error:\n{result.stderr}"
 
         file_size = os.path.getsize(output_file)
         if file_size == 0:
-            if os.path.exists(list_file):
-                os.remove(list_file)
-            if os.path.exists(output_file):
-                os.remove(output_file)
+            os.remove(output_file)
             return False, f"Output file is empty. ffmpeg error:\n{result.stderr}"
 
         # Check return code
         if result.returncode != 0:
-            if os.path.exists(list_file):
-                os.remove(list_file)
             return False, f"ffmpeg failed with error:\n{result.stderr}"
 
-        # Clean up
-        if os.path.exists(list_file):
-            os.remove(list_file)
+        # A container probe catches truncated output without decoding it
+        ok, verify_message = verify_audiobook(
+            output_file, total, count, len(audio_files)
+        )
+        if not ok:
+            os.remove(output_file)
+            return False, f"Output failed verification: {verify_message}"
+
+        write_manifest(
+            output_file,
+            manifest,
+            {"duration": total, "chapters": count, "audio_streams": 1},
+        )
 
         size_mb = file_size / (1024 * 1024)
-        return True, f"Successfully created: {output_file}\nSize: {size_mb:.1f} MB"
+        return True, (
+            f"Successfully created: {output_file}\n"
+            f"Plan: {plan.mode} ({plan.reason})\n"
+            f"Size: {size_mb:.1f} MB"
+        )
 
-    except subprocess.CalledProcessError as e:
-        if os.path.exists(list_file):
-            os.remove(list_file)
-        error_output = e.stderr if hasattr(e, "stderr") and e.stderr else str(e)
-        return False, f"Error combining files: {error_output}"
     except FileNotFoundError:
-        if os.path.exists(list_file):
-            os.remove(list_file)
         return False, "ffmpeg not found. Install it with: brew install ffmpeg"
+    except RuntimeError as e:
+        return False, str(e)
+    finally:
+        # Clean up
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def find_book_dirs(root_dir: str) -> list[Path]:
+    """Find every book folder under root_dir
+
+    A book is a folder whose subfolders are all disc folders ("Disc 1",
+    "CD 2", ...), combined recursively, or any other folder that directly
+    holds audio files. Those only get their own files combined, and their
+    subfolders are searched for more books.
+    """
+    book_dirs = []
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        # Skip hidden folders and walk in a stable order
+        dirnames[:] = sorted(
+            (d for d in dirnames if not d.startswith(".")), key=natural_key
+        )
+        if dirnames and all(DISC_DIR_PATTERN.match(d) for d in dirnames):
+            dirnames[:] = []  # the discs are part of this book
+            book_dirs.append(Path(dirpath))
+        elif any(Path(name).suffix.lower() in AUDIO_EXTENSIONS for name in filenames):
+            book_dirs.append(Path(dirpath))
+    return book_dirs
+
+
+def has_disc_folders(book_dir: Path) -> bool:
+    """True if every (non-hidden) subfolder of book_dir is a disc folder"""
+    with os.scandir(book_dir) as it:
+        names = [
+            entry.name
+            for entry in it
+            if entry.is_dir() and not entry.name.startswith(".")
+        ]
+    return bool(names) and all(DISC_DIR_PATTERN.match(name) for name in names)
+
+
+def library_output_path(book_dir: Path, root: Path, output_dir: str | None) -> Path:
+    """Output path for a book found under a library root"""
+    if not output_dir:
+        return book_dir / f"{book_dir.name}_combined.m4b"
+    # Flatten the relative path so same-named books in different
+    # author folders do not collide
+    relative = book_dir.relative_to(root)
+    name = " - ".join(relative.parts) if relative.parts else root.name
+    return Path(output_dir) / f"{name}.m4b"
+
+
+def combine_book(
+    book_dir: Path, output_path: Path, **combine_options: Any
+) -> tuple[bool, str]:
+    """Combine one library book without prompts, using its own cover
+
+    Never raises, so one bad folder cannot stop a batch or watch run.
+    """
+    try:
+        return combine_audiobook(
+            str(book_dir),
+            str(output_path),
+            cover_image=find_cover_image(str(book_dir), check_embedded=True),
+            verbose=False,
+            # Disc folders are part of the book; other subfolders are not
+            **{**combine_options, "recursive": has_disc_folders(book_dir)},
+        )
+    except Exception as e:
+        return False, f"Unexpected error: {e}"
+
+
+def combine_library(
+    root_dir: str,
+    output_dir: str | None = None,
+    workers: int | None = None,
+    summary_file: str | None = None,
+    **combine_options: Any,
+) -> tuple[int, int]:
+    """Combine every book folder under root_dir on a bounded worker pool
+
+    Args:
+        root_dir: Library directory to search for book folders
+        output_dir: Optional directory for combined files (default: each book folder)
+        workers: Number of concurrent ffmpeg jobs (default: CPU count)
+        summary_file: Path for the per-book CSV summary
+            (default: root_dir/combine_summary.csv)
+        **combine_options: Passed on to combine_audiobook (incremental,
+            hash_inputs, transcode, ...)
+
+    Returns:
+        Tuple of (succeeded_count, failed_count)
+    """
+    import csv
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    root = Path(root_dir)
+    book_dirs = find_book_dirs(root_dir)
+    if not book_dirs:
+        print(f"No book folders with audio files found in {root_dir}")
+        return 0, 0
+
+    workers = workers or os.cpu_count() or 1
+    # Books already run in parallel, so split the cores between them
+    transcode_workers = max(1, (os.cpu_count() or 1) // min(workers, len(book_dirs)))
+    summary_file = summary_file or str(root / "combine_summary.csv")
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    def output_for(book_dir: Path) -> Path:
+        return library_output_path(book_dir, root, output_dir)
+
+    def run_job(book_dir: Path) -> tuple[bool, str, float]:
+        start = time.monotonic()
+        success, message = combine_book(
+            book_dir, output_for(book_dir), workers=transcode_workers, **combine_options
+        )
+        return success, message, time.monotonic() - start
+
+    print(f"Combining {len(book_dirs)} books with {workers} workers...\n")
+
+    def status_of(success: bool, message: str) -> str:
+        if not success:
+            return "failed"
+        return "skipped" if message.startswith(UP_TO_DATE_MESSAGE) else "ok"
+
+    results: list[tuple[Path, bool, str, float]] = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, book_dir): book_dir for book_dir in book_dirs}
+        for done, future in enumerate(as_completed(futures), start=1):
+            book_dir = futures[future]
+            success, message, elapsed = future.result()
+            results.append((book_dir, success, message, elapsed))
+            status = status_of(success, message).upper()
+            print(
+                f"[{done}/{len(book_dirs)}] {status:7} {book_dir.name} ({elapsed:.1f}s)"
+            )
+
+    with open(summary_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["book", "output", "status", "seconds", "message"])
+        for book_dir, success, message, elapsed in sorted(results):
+            writer.writerow(
+                [
+                    str(book_dir),
+                    str(output_for(book_dir)),
+                    status_of(success, message),
+                    f"{elapsed:.1f}",
+                    message.strip().splitlines()[-1] if message.strip() else "",
+                ]
+            )
+
+    succeeded = sum(1 for _, success, _, _ in results if success)
+    failed = len(results) - succeeded
+    skipped = sum(
+        1
+        for _, success, message, _ in results
+        if status_of(success, message) == "skipped"
+    )
+    print(f"\nDone: {succeeded} succeeded ({skipped} up to date), {failed} failed")
+    print(f"Summary written to: {summary_file}")
+    return succeeded, failed
+
+
+def folder_signature(book_dir: Path) -> str:
+    """Digest of every file's path, size and mtime in a book
+
+    Covers book_dir and, for a book of disc folders, everything below it.
+    Unlike the directory mtime this also changes while files are still
+    being copied in. Hidden entries and combine outputs (manifests and
+    the files they describe) are ignored, so building a book in place
+    does not make it look changed. Entries that vanish while being read
+    (such as a copy tool's temp files) still change the digest; only a
+    missing book_dir raises OSError.
+    """
+    import hashlib
+
+    recursive = has_disc_folders(book_dir)
+    entries = []
+    pending = [book_dir]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as it:
+                dir_entries = [e for e in it if not e.name.startswith(".")]
+        except OSError:
+            if current == book_dir:
+                raise
+            entries.append(f"{current}:unreadable")
+            continue
+        names = {entry.name for entry in dir_entries}
+        for entry in dir_entries:
+            if entry.is_dir():
+                if recursive and not entry.is_symlink():
+                    pending.append(Path(entry.path))
+            elif not (
+                entry.name.endswith(".manifest.json")
+                or f"{entry.name}.manifest.json" in names
+            ):
+                try:
+                    stat = entry.stat()
+                except OSError:  # removed or renamed since it was listed
+                    entries.append(f"{entry.path}:missing")
+                    continue
+                entries.append(f"{entry.path}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha256("\n".join(sorted(entries)).encode()).hexdigest()
+
+
+class WatchState:
+    """Queue state for watch mode, saved to JSON after every change
+
+    Books stay in `pending` until their job finishes, so a restart
+    re-queues anything that was waiting or running. Failed books keep the
+    signature they failed with and are not retried until it changes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.pending: list[str] = []
+        self.done: dict[str, str] = {}  # book dir -> signature when built
+        # book dir -> {"signature": ..., "error": ...}
+        self.failed: dict[str, dict[str, str]] = {}
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            self.pending = state.get("pending", [])
+            self.done = state.get("done", {})
+            # Older state files stored just the error message
+            self.failed = {
+                book: (
+                    failure
+                    if isinstance(failure, dict)
+                    else {"signature": "", "error": failure}
+                )
+                for book, failure in state.get("failed", {}).items()
+            }
+        except (OSError, ValueError):
+            pass
+
+    def save(self) -> None:
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"pending": self.pending, "done": self.done, "failed": self.failed},
+                f,
+                indent=2,
+            )
+        os.replace(tmp_path, self.path)
+
+
+async def watch_folder(
+    drop_dir: str,
+    output_dir: str | None = None,
+    concurrency: int = 2,
+    settle: float = 30.0,
+    poll_interval: float = 5.0,
+    state_file: str | None = None,
+    **combine_options: Any,
+) -> None:
+    """Watch a drop folder and combine new books as they finish arriving
+
+    A book is queued once its files have not changed for `settle` seconds.
+    Up to `concurrency` combines run at once on worker threads. Changes are
+    picked up with inotify when the optional inotify_simple package is
+    installed, otherwise by polling every `poll_interval` seconds.
+
+    Args:
+        drop_dir: Folder to watch for new book folders
+        output_dir: Optional directory for combined files (default: each book folder)
+        concurrency: Maximum number of combines running at once
+        settle: Seconds a book's files must stay unchanged before it is queued
+        poll_interval: Seconds between rescans of the drop folder
+        state_file: Path for the persisted queue
+            (default: drop_dir/.audiobook_queue.json)
+        **combine_options: Passed on to combine_audiobook
+    """
+    import asyncio
+
+    try:
+        from inotify_simple import INotify, flags  # type: ignore[import-not-found]
+
+        inotify: Any = INotify()
+        watch_mask = flags.CREATE | flags.CLOSE_WRITE | flags.MOVED_TO | flags.DELETE
+    except ImportError:
+        inotify = None
+
+    root = Path(drop_dir)
+    state = WatchState(Path(state_file or root / ".audiobook_queue.json"))
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for book in state.pending:
+        queue.put_nowait(book)
+    if state.pending:
+        print(f"Resuming {len(state.pending)} queued book(s)")
+
+    async def worker() -> None:
+        while True:
+            book = await queue.get()
+            book_dir = Path(book)
+            print(f"Combining: {book_dir.name}")
+            signature = ""
+            try:
+                signature = await asyncio.to_thread(folder_signature, book_dir)
+                success, message = await asyncio.to_thread(
+                    combine_book,
+                    book_dir,
+                    library_output_path(book_dir, root, output_dir),
+                    **combine_options,
+                )
+            except OSError as e:  # folder removed while queued
+                success, message = False, f"Unexpected error: {e}"
+            summary = message.strip().splitlines()[-1] if message.strip() else ""
+            if success:
+                state.done[book] = signature
+                state.failed.pop(book, None)
+            else:
+                state.failed[book] = {"signature": signature, "error": summary}
+            state.pending.remove(book)
+            state.save()
+            status = "OK" if success else "FAILED"
+            print(f"{status:6} {book_dir.name}: {summary}")
+            queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # book dir -> (signature, monotonic time it was first seen unchanged)
+    settling: dict[str, tuple[str, float]] = {}
+    print(f"Watching {drop_dir} (concurrency {concurrency}, settle {settle:.0f}s)")
+    try:
+        while True:
+            book_dirs = await asyncio.to_thread(find_book_dirs, drop_dir)
+            now = time.monotonic()
+            for book_dir in book_dirs:
+                book = str(book_dir)
+                try:
+                    if inotify is not None:
+                        inotify.add_watch(book, watch_mask)
+                    if book in state.pending:
+                        continue
+                    signature = await asyncio.to_thread(folder_signature, book_dir)
+                except OSError:
+                    # Removed or renamed mid-scan: not settled yet
+                    settling.pop(book, None)
+                    continue
+                if state.done.get(book) == signature:
+                    continue
+                if state.failed.get(book, {}).get("signature") == signature:
+                    continue  # failed as it is; wait for it to change
+                previous = settling.get(book)
+                if previous is None or previous[0] != signature:
+                    settling[book] = (signature, now)
+                elif now - previous[1] >= settle:
+                    del settling[book]
+                    state.pending.append(book)
+                    state.save()
+                    await queue.put(book)
+                    print(f"Queued: {book_dir.name}")
+
+            # Sleep until the next poll, or until inotify reports a change
+            if inotify is not None:
+                inotify.add_watch(drop_dir, watch_mask)
+                await asyncio.to_thread(inotify.read, int(poll_interval * 1000))
+            else:
+                await asyncio.sleep(poll_interval)
+    finally:
+        for task in workers:
+            task.cancel()
 
 
 def select_folder_gui():
@@ -235,6 +1919,28 @@ def show_message_gui(title: str, message: str, msg_type: str = "information") ->
     _ = subprocess.run(["osascript", "-e", script], capture_output=True)
 
 
+def show_notification_gui(title: str, message: str) -> None:
+    """Use AppleScript to post a non-blocking notification"""
+    script = f'display notification "{message}" with title "{title}"'
+    _ = subprocess.run(["osascript", "-e", script], capture_output=True)
+
+
+def notify_progress_gui(step: int = 25) -> Callable[[FFmpegProgress], None]:
+    """Progress callback for GUI mode: notify every `step` percent"""
+    next_step = step
+
+    def callback(progress: FFmpegProgress) -> None:
+        nonlocal next_step
+        print_progress(progress)
+        percent = progress.percent
+        if percent is not None and percent >= next_step and not progress.done:
+            show_notification_gui("Audiobook Combiner", format_progress(progress))
+            while next_step <= percent:
+                next_step += step
+
+    return callback
+
+
 def ask_yes_no_gui(prompt: str) -> bool:
     """Use AppleScript to show a native yes/no dialog"""
     script = f'''
@@ -266,8 +1972,12 @@ def main_gui():
         print("Cancelled by user")
         return
 
-    # Check for audio files
+    # Check for audio files, falling back to nested disc folders
+    recursive = False
     audio_files = get_audio_files(input_dir)
+    if not audio_files:
+        recursive = True
+        audio_files = get_audio_files(input_dir, recursive=True)
 
     if not audio_files:
         show_message_gui(
@@ -316,7 +2026,7 @@ def main_gui():
             metadata["album"] = album
 
     # Check for cover image
-    auto_cover = find_cover_image(input_dir)
+    auto_cover = find_cover_image(input_dir, check_embedded=True)
     cover_image = None
 
     if auto_cover:
@@ -341,7 +2051,12 @@ def main_gui():
     # Combine the files
     meta_to_use = metadata if metadata else None
     success, message = combine_audiobook(
-        input_dir, output_path, meta_to_use, cover_image
+        input_dir,
+        output_path,
+        meta_to_use,
+        cover_image,
+        progress_callback=notify_progress_gui(),
+        recursive=recursive,
     )
 
     if success:
@@ -350,14 +2065,16 @@ def main_gui():
         show_message_gui("Error", message, "stop")
 
 
-def main_cli():
+def main_cli(
+    input_dir: str | None = None,
+    output_file: str | None = None,
+    combine_options: dict[str, Any] | None = None,
+):
     """CLI mode (original interactive mode)"""
     print("=== Audiobook Combiner ===\n")
 
     # Get input directory
-    if len(sys.argv) > 1:
-        input_dir = sys.argv[1]
-    else:
+    if input_dir is None:
         input_dir = input("Enter the directory containing audio files: ").strip()
 
     if not os.path.isdir(input_dir):
@@ -365,9 +2082,7 @@ def main_cli():
         sys.exit(1)
 
     # Get output filename
-    if len(sys.argv) > 2:
-        output_file = sys.argv[2]
-    else:
+    if output_file is None:
         default_name = f"{Path(input_dir).name}_combined.m4b"
         output_file = input(f"Enter output filename [{default_name}]: ").strip()
         if not output_file:
@@ -400,7 +2115,7 @@ def main_cli():
 
     # Check for cover image
     cover_image = None
-    auto_cover = find_cover_image(input_dir)
+    auto_cover = find_cover_image(input_dir, check_embedded=True)
 
     if auto_cover:
         use_cover = (
@@ -424,24 +2139,309 @@ def main_cli():
     # Combine the files
     meta_to_use = metadata if metadata else None
     success, message = combine_audiobook(
-        input_dir, output_path, meta_to_use, cover_image
+        input_dir,
+        output_path,
+        meta_to_use,
+        cover_image,
+        progress_callback=print_progress,
+        **(combine_options or {}),
     )
 
     _ = print(f"\n{message}")
     sys.exit(0 if success else 1)
 
 
+def main_run(
+    input_dir: str,
+    output_file: str | None = None,
+    metadata: dict[str, str] | None = None,
+    cover_image: str | None = None,
+    auto_cover: bool = True,
+    combine_options: dict[str, Any] | None = None,
+):
+    """Non-interactive mode: everything comes from arguments, no prompts"""
+    if not os.path.isdir(input_dir):
+        print(f"Error: '{input_dir}' is not a valid directory")
+        sys.exit(1)
+
+    output_file = output_file or f"{Path(input_dir).name}_combined.m4b"
+    if not Path(output_file).suffix:
+        output_file += ".m4b"
+    output_path = str(Path(input_dir) / output_file)
+
+    if cover_image is None and auto_cover:
+        cover_image = find_cover_image(input_dir, check_embedded=True)
+
+    success, message = combine_audiobook(
+        input_dir,
+        output_path,
+        metadata or None,
+        cover_image,
+        progress_callback=print_progress if sys.stdout.isatty() else None,
+        **(combine_options or {}),
+    )
+
+    _ = print(f"\n{message}")
+    sys.exit(0 if success else 1)
+
+
+def main_list(input_dir: str, order: str = "name", recursive: bool = False):
+    """List mode: print the inputs in combine order without combining"""
+    if not os.path.isdir(input_dir):
+        print(f"Error: '{input_dir}' is not a valid directory")
+        sys.exit(1)
+
+    root = Path(input_dir).absolute()
+    audio_files = get_audio_files(input_dir, order, recursive)
+    for index, audio_file in enumerate(audio_files, start=1):
+        print(f"{index:4}  {audio_file.relative_to(root)}")
+    sys.exit(0 if audio_files else 1)
+
+
+def main_batch(
+    root_dir: str,
+    output_dir: str | None = None,
+    combine_options: dict[str, Any] | None = None,
+):
+    """Batch mode: combine every book folder under a library root"""
+    print("=== Audiobook Combiner (batch mode) ===\n")
+
+    if not os.path.isdir(root_dir):
+        print(f"Error: '{root_dir}' is not a valid directory")
+        sys.exit(1)
+
+    _, failed = combine_library(root_dir, output_dir, **(combine_options or {}))
+    sys.exit(1 if failed else 0)
+
+
+def main_watch(
+    drop_dir: str,
+    output_dir: str | None = None,
+    combine_options: dict[str, Any] | None = None,
+    watch_options: dict[str, Any] | None = None,
+):
+    """Watch mode: combine books dropped into a folder until interrupted"""
+    import asyncio
+
+    print("=== Audiobook Combiner (watch mode) ===\n")
+
+    if not os.path.isdir(drop_dir):
+        print(f"Error: '{drop_dir}' is not a valid directory")
+        sys.exit(1)
+
+    try:
+        asyncio.run(
+            watch_folder(
+                drop_dir,
+                output_dir,
+                **(watch_options or {}),
+                **(combine_options or {}),
+            )
+        )
+    except KeyboardInterrupt:
+        print("\nStopped; queued books resume on the next start")
+
+
+def main_verify(paths: list[str]):
+    """Verify mode: check combined files without decoding them"""
+    results = verify_outputs(paths)
+    for output_file, ok, message in results:
+        print(f"{'OK  ' if ok else 'FAIL'}  {output_file}: {message}")
+
+    failed = sum(1 for _, ok, _ in results if not ok)
+    print(f"\n{len(results) - failed} ok, {failed} failed")
+    sys.exit(1 if failed or not results else 0)
+
+
 def main():
-    # Check if CLI mode is requested
-    if len(sys.argv) > 1 and sys.argv[1] in ["--cli", "-c"]:
-        _ = sys.argv.pop(1)  # Remove the flag
-        main_cli()
-    elif len(sys.argv) > 1:
-        # If arguments provided, use CLI mode
-        main_cli()
-    else:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Combine a folder of audio files into one audiobook.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        help="INPUT_DIR [OUTPUT_FILE]; LIBRARY_DIR [OUTPUT_DIR] with --batch "
+        "or --watch; files or folders with --verify.",
+    )
+
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument(
+        "-c", "--cli", action="store_true", help="Prompt for anything not given."
+    )
+    modes.add_argument(
+        "-b", "--batch", action="store_true", help="Combine every book in a library."
+    )
+    modes.add_argument(
+        "-w", "--watch", action="store_true", help="Combine books as they arrive."
+    )
+    modes.add_argument(
+        "-V", "--verify", action="store_true", help="Check combined files."
+    )
+    modes.add_argument(
+        "-l",
+        "--list",
+        action="store_true",
+        help="Print the input files in combine order and exit (dry run).",
+    )
+
+    book = parser.add_argument_group("book")
+    book.add_argument("--title", help="Title tag.")
+    book.add_argument("--author", help="Author (artist) tag.")
+    book.add_argument("--album", help="Album/series tag.")
+    book.add_argument("--cover", help="Cover image (default: found in INPUT_DIR).")
+    book.add_argument(
+        "--no-cover", action="store_true", help="Do not look for a cover image."
+    )
+
+    combine = parser.add_argument_group("combine options")
+    combine.add_argument(
+        "--force", action="store_true", help="Rebuild even if up to date."
+    )
+    combine.add_argument(
+        "--hash", action="store_true", help="Compare input contents, not just mtimes."
+    )
+    combine.add_argument(
+        "--transcode", action="store_true", help="Re-encode every input in parallel."
+    )
+    combine.add_argument("--bitrate", help="Bitrate for transcoded files, e.g. 64k.")
+    combine.add_argument(
+        "--normalize", action="store_true", help="Level loudness across files."
+    )
+    combine.add_argument(
+        "--target-lufs",
+        type=float,
+        default=-16.0,
+        help="Loudness target for --normalize (default: -16).",
+    )
+    combine.add_argument(
+        "--tag-order", action="store_true", help="Order by disc/track tags."
+    )
+    combine.add_argument(
+        "--recursive", action="store_true", help="Include nested disc folders."
+    )
+    combine.add_argument(
+        "--no-chapters", action="store_true", help="Do not add chapter markers."
+    )
+    combine.add_argument("--workers", type=int, help="Parallel jobs (default: CPUs).")
+
+    watch = parser.add_argument_group("watch options")
+    watch.add_argument(
+        "--concurrency",
+        type=int,
+        default=2,
+        help="Books combined at once with --watch (default: 2).",
+    )
+    watch.add_argument(
+        "--settle",
+        type=float,
+        default=30.0,
+        help="Seconds a book must stay unchanged before it is queued (default: 30).",
+    )
+    watch.add_argument(
+        "--poll-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between rescans of the drop folder (default: 5).",
+    )
+
+    args = parser.parse_args()
+    paths: list[str] = args.paths
+
+    # Combine options apply to every mode
+    combine_options: dict[str, Any] = {
+        "incremental": not args.force,
+        "hash_inputs": args.hash,
+        "transcode": args.transcode,
+        "bitrate": args.bitrate,
+        "normalize": args.normalize,
+        "target_lufs": args.target_lufs,
+        "order": "tags" if args.tag_order else "name",
+        "recursive": args.recursive,
+        "chapters": not args.no_chapters,
+        "workers": args.workers,
+    }
+    metadata = {
+        key: value
+        for key, value in (
+            ("title", args.title),
+            ("author", args.author),
+            ("album", args.album),
+        )
+        if value
+    }
+
+    # Book options only apply to a single combine
+    mode = next(
+        (
+            f"--{name}"
+            for name in ("batch", "watch", "list", "verify")
+            if getattr(args, name)
+        ),
+        None,
+    )
+    book_flags = [
+        flag
+        for flag, value in (
+            ("--title", args.title),
+            ("--author", args.author),
+            ("--album", args.album),
+            ("--cover", args.cover),
+            ("--no-cover", args.no_cover),
+        )
+        if value
+    ]
+    if mode and book_flags:
+        parser.error(f"{', '.join(book_flags)} cannot be used with {mode}")
+
+    if args.verify:
+        if not paths:
+            parser.error("--verify needs at least one file or folder")
+        main_verify(paths)
+    elif args.cli:
+        if len(paths) > 2:
+            parser.error("--cli takes at most INPUT_DIR and OUTPUT_FILE")
+        main_cli(*paths, combine_options=combine_options)
+    elif not sys.argv[1:]:
         # No arguments, use GUI mode
         main_gui()
+    elif not paths:
+        # Never fall back to dialogs when a script passed options
+        parser.error(
+            f"{mode} needs a folder"
+            if mode
+            else "INPUT_DIR is required (run with no arguments for the GUI)"
+        )
+    elif len(paths) > 2:
+        parser.error("expected at most two paths")
+    elif args.list:
+        if len(paths) > 1:
+            parser.error("--list takes a single INPUT_DIR")
+        main_list(paths[0], combine_options["order"], args.recursive)
+    elif args.batch:
+        main_batch(*paths, combine_options=combine_options)
+    elif args.watch:
+        main_watch(
+            *paths,
+            combine_options=combine_options,
+            watch_options={
+                "concurrency": args.concurrency,
+                "settle": args.settle,
+                "poll_interval": args.poll_interval,
+            },
+        )
+    else:
+        main_run(
+            paths[0],
+            paths[1] if len(paths) > 1 else None,
+            metadata,
+            args.cover,
+            not args.no_cover,
+            combine_options,
+        )
 
 
 if __name__ == "__main__":
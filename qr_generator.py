@@ -9,12 +9,47 @@ CLI Usage:
     python qr_generator.py "https://example.com"
     python qr_generator.py "Some text" -o my_qr.png
     python qr_generator.py "Some text" -f svg -o my_qr.svg --open
+    python qr_generator.py --batch labels.csv -d labels/ --workers 8
+    python qr_generator.py --batch labels.csv --archive labels.zip
+    python qr_generator.py --batch labels.csv --sheet labels.pdf --captions
+
+Batch input is CSV (with a header row) or JSONL (one object per line).
+Each row needs a `data` field and may set `output` (file name) and any of
+`format`, `error_correction`, `box_size`, `border`, `fill_color` and
+`back_color`; missing fields fall back to the command-line options.
+With --sheet the codes are laid out on a grid in one PDF (a page per
+--columns x --rows codes), PNG or SVG instead, captioned with the row's
+`caption` field (or its data) when --captions is given.
 """
 
 import argparse
+import functools
 import os
 import sys
-from typing import Any
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from typing import IO, Any
+
+# A module matrix: rows of booleans (True = dark), without the quiet zone
+Matrix = tuple[tuple[bool, ...], ...]
+MATRIX_CACHE_SIZE = 1024
+# Bump when the on-disk matrix format changes
+MATRIX_CACHE_VERSION = 1
+# Bump when rendering changes, so stored images are not reused
+OUTPUT_CACHE_VERSION = 1
+OUTPUT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Options a batch row may override, with the type each is converted to
+ROW_OPTIONS = {
+    "format": str,
+    "error_correction": str,
+    "box_size": int,
+    "border": int,
+    "fill_color": str,
+    "back_color": str,
+}
+BATCH_CHUNK_SIZE = 64
 
 # ---------------------------------------------------------------------------
 # Dependency check
@@ -43,19 +78,8 @@ def check_dependencies() -> None:
 # ---------------------------------------------------------------------------
 
 
-def generate_qr(
-    data: str,
-    output_path: str,
-    fmt: str = "png",
-    error_correction: str = "M",
-    box_size: int = 10,
-    border: int = 4,
-    fill_color: str = "black",
-    back_color: str = "white",
-) -> str:
-    import qrcode
+def error_correction_level(error_correction: str) -> int:
     import qrcode.constants
-    import qrcode.image.svg
 
     levels = {
         "L": qrcode.constants.ERROR_CORRECT_L,  # ~7%
@@ -63,42 +87,867 @@ def generate_qr(
         "Q": qrcode.constants.ERROR_CORRECT_Q,  # ~25%
         "H": qrcode.constants.ERROR_CORRECT_H,  # ~30%
     }
+    return levels[error_correction.upper()]
+
+
+def _matrix_cache_path(data: str, error_correction: str, cache_dir: str) -> str:
+    import hashlib
+
+    key = f"{MATRIX_CACHE_VERSION}\0{error_correction.upper()}\0{data}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, digest[:2], f"{digest}.txt")
+
+
+@functools.lru_cache(maxsize=MATRIX_CACHE_SIZE)
+def qr_matrix(
+    data: str, error_correction: str = "M", cache_dir: str | None = None
+) -> Matrix:
+    """Encode data to a module matrix, cached by (data, error correction)
+
+    The version search and mask selection only depend on these two inputs,
+    so rendering the same payload at other sizes, colors or formats reuses
+    the result. Recent matrices are kept in memory; with cache_dir they are
+    also stored on disk (one text file of 0/1 rows per matrix) and shared
+    between runs and batch worker processes.
+    """
+    import qrcode
+
+    path = _matrix_cache_path(data, error_correction, cache_dir) if cache_dir else None
+    if path:
+        try:
+            with open(path, encoding="ascii") as f:
+                return tuple(
+                    tuple(c == "1" for c in line.strip()) for line in f if line.strip()
+                )
+        except OSError:
+            pass
 
     qr = qrcode.QRCode(
         version=None,  # auto-size
-        error_correction=levels[error_correction.upper()],
-        box_size=box_size,
-        border=border,
+        error_correction=error_correction_level(error_correction),
+        border=0,
     )
     qr.add_data(data)
     qr.make(fit=True)
+    matrix = tuple(tuple(bool(module) for module in row) for row in qr.modules)
+
+    if path:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="ascii") as f:
+            for row in matrix:
+                _ = f.write("".join("1" if module else "0" for module in row) + "\n")
+        os.replace(tmp_path, path)
+    return matrix
+
+
+def render_matrix(
+    matrix: Matrix,
+    box_size: int = 10,
+    border: int = 4,
+    fill_color: Any = "black",
+    back_color: Any = "white",
+) -> Any:
+    """Render a module matrix to a PIL image without drawing module by module
+
+    The matrix becomes a one-pixel-per-module image that PIL scales up by
+    box_size with a nearest-neighbour resize, so the work is done in C
+    rather than in a Python loop. Image modes match qrcode's PilImage: 1-bit
+    for black on white, RGB otherwise. Returns None for a transparent
+    background, which is left to qrcode.
+    """
+    from PIL import Image, ImageOps
+
+    fill = fill_color.lower() if isinstance(fill_color, str) else fill_color
+    back = back_color.lower() if isinstance(back_color, str) else back_color
+    if back == "transparent":
+        return None
+
+    # Scale a 1-bit image, one pixel per module (dark modules are 0, as
+    # in qrcode's black on white image)
+    count = len(matrix)
+    modules = Image.frombytes(
+        "L",
+        (count, count),
+        bytes(0 if module else 255 for row in matrix for module in row),
+    ).convert("1", dither=Image.Dither.NONE)
+    modules = ImageOps.expand(modules, border=border, fill=255)
+    pixel_size = (count + border * 2) * box_size
+    modules = modules.resize((pixel_size, pixel_size), Image.Resampling.NEAREST)
+
+    if fill == "black" and back == "white":
+        return modules
+    img = Image.new("RGB", (pixel_size, pixel_size), fill)
+    img.paste(back, mask=modules)
+    return img
+
+
+def matrix_svg_path(matrix: Matrix, border: int = 0) -> str:
+    """Minimal SVG path data for the dark modules, in module units
+
+    Each row's dark modules are merged into horizontal runs, and a run
+    that repeats unchanged in the rows below is extended into one
+    rectangle, so a code needs far fewer path commands than one square
+    per module. Coordinates are integers.
+    """
+    rects: list[tuple[int, int, int, int]] = []  # (y, x, width, height)
+    open_runs: dict[tuple[int, int], int] = {}  # (x, width) -> first row
+    for y, row in enumerate([*matrix, ()]):  # the empty row closes all runs
+        runs = set()
+        x = 0
+        while x < len(row):
+            if row[x]:
+                start = x
+                while x < len(row) and row[x]:
+                    x += 1
+                runs.add((start, x - start))
+            x += 1
+        for run in list(open_runs):
+            if run not in runs:
+                first = open_runs.pop(run)
+                rects.append((first, run[0], run[1], y - first))
+        for run in runs:
+            open_runs.setdefault(run, y)
+
+    return "".join(
+        f"M{x + border} {y + border}h{width}v{height}h-{width}z"
+        for y, x, width, height in sorted(rects)
+    )
+
+
+def matrix_svg(
+    matrix: Matrix,
+    box_size: int = 10,
+    border: int = 4,
+    fill_color: str = "black",
+    back_color: str = "white",
+) -> bytes:
+    """Encode a module matrix as a compact SVG document
+
+    The viewBox is in modules and the physical size matches qrcode's SVG
+    output (box_size tenths of a millimetre per module). A transparent
+    back_color leaves out the background.
+    """
+    from xml.sax.saxutils import quoteattr
+
+    size = len(matrix) + border * 2
+    units = f"{size * box_size / 10:g}mm"
+    background = (
+        ""
+        if str(back_color).lower() == "transparent"
+        else f'<rect width="{size}" height="{size}" fill={quoteattr(back_color)}/>'
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{units}" height="{units}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f"{background}<path fill={quoteattr(fill_color)} "
+        f'd="{matrix_svg_path(matrix, border)}"/></svg>\n'
+    ).encode("utf-8")
+
+
+@contextmanager
+def _replacing(path: str) -> Iterator[str]:
+    """Yield a unique temporary path that is renamed over path on success"""
+    import uuid
+
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_output(output: str | IO[bytes], payload: bytes) -> None:
+    """Write payload to a buffer, or atomically replace the file at a path
+
+    Files are written under a temporary name and renamed over the output,
+    so an existing output that is a hard link into an OutputStore is
+    unlinked rather than overwritten through the link.
+    """
+    if not isinstance(output, str):
+        _ = output.write(payload)
+        return
+    with _replacing(output) as tmp_path, open(tmp_path, "xb") as f:
+        _ = f.write(payload)
+
+
+class OutputStore:
+    """Content-addressed store of finished images, with a size cap
+
+    Images are keyed by a hash of everything that affects their bytes.
+    A hit refreshes the file's mtime, and when the store grows past
+    max_bytes the least recently used files are removed until it is back
+    under 90% of the cap. Several processes may share a directory:
+    eviction is best effort and tolerates files vanishing underneath it.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = OUTPUT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size: int | None = None  # measured on first write
+
+    def path(self, fmt: str, *options: Any) -> str:
+        import hashlib
+        import json
+
+        key = json.dumps([OUTPUT_CACHE_VERSION, fmt.lower(), *options])
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.{fmt.lower()}")
+
+    def fetch(self, path: str, output: str | IO[bytes]) -> bool:
+        """Copy a stored image to output; False if it is not stored"""
+        import shutil
+
+        try:
+            os.utime(path)  # mark as recently used
+            if not isinstance(output, str):
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, output)
+                return True
+            if os.path.exists(output) and os.path.samefile(path, output):
+                return True  # already linked by an earlier run
+            # Hard link when possible, replacing any existing output
+            with _replacing(output) as tmp_path:
+                try:
+                    os.link(path, tmp_path)
+                except OSError:  # other filesystem, or links not supported
+                    shutil.copyfile(path, tmp_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def put(self, path: str, payload: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_output(path, payload)
+
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += len(payload)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) of every stored image"""
+        entries = []
+        for dir_path, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dir_path, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 9 // 10
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+
+@functools.lru_cache(maxsize=None)
+def output_store(
+    directory: str, max_bytes: int = OUTPUT_CACHE_MAX_BYTES
+) -> OutputStore:
+    """One OutputStore per directory and cap, so size tracking is shared"""
+    return OutputStore(directory, max_bytes)
+
+
+def generate_qr(
+    data: str,
+    output_path: str | IO[bytes],
+    fmt: str = "png",
+    error_correction: str = "M",
+    box_size: int = 10,
+    border: int = 4,
+    fill_color: str = "black",
+    back_color: str = "white",
+    cache_dir: str | None = None,
+    output_cache: str | None = None,
+    output_cache_size: int = OUTPUT_CACHE_MAX_BYTES,
+) -> str | IO[bytes]:
+    """Write a QR code to a file path or any binary file-like object
+
+    With output_cache (a directory), finished images are kept in an
+    OutputStore capped at output_cache_size bytes. A repeat request is
+    hard-linked (or copied) from there instead of being rendered again.
+    Returns output_path, so a path or buffer can be passed straight on.
+    """
+    import qrcode
+
+    if output_cache:
+        store = output_store(output_cache, output_cache_size)
+        stored = store.path(
+            fmt,
+            data,
+            error_correction.upper(),
+            box_size,
+            border,
+            str(fill_color),
+            str(back_color),
+        )
+        if store.fetch(stored, output_path):
+            return output_path
+        payload = qr_bytes(
+            data,
+            fmt,
+            error_correction=error_correction,
+            box_size=box_size,
+            border=border,
+            fill_color=fill_color,
+            back_color=back_color,
+            cache_dir=cache_dir,
+        )
+        store.put(stored, payload)
+        write_output(output_path, payload)
+        return output_path
+
+    if isinstance(output_path, str):
+        # Encode in memory, then replace the file (see write_output)
+        payload = qr_bytes(
+            data,
+            fmt,
+            error_correction=error_correction,
+            box_size=box_size,
+            border=border,
+            fill_color=fill_color,
+            back_color=back_color,
+            cache_dir=cache_dir,
+        )
+        write_output(output_path, payload)
+        return output_path
+
+    matrix = qr_matrix(data, error_correction.upper(), cache_dir)
 
     if fmt.lower() == "svg":
-        factory = qrcode.image.svg.SvgPathFillImage
-        img: Any = qr.make_image(image_factory=factory)
-    else:
-        img = qr.make_image(fill_color=fill_color, back_color=back_color)
+        svg = matrix_svg(matrix, box_size, border, fill_color, back_color)
+        _ = output_path.write(svg)
+        return output_path
+
+    img: Any = render_matrix(matrix, box_size, border, fill_color, back_color)
+    if img is not None:
+        img.save(output_path, format="PNG")
+        return output_path
+
+    # Hand the cached matrix to a QRCode so make_image skips make()
+    qr = qrcode.QRCode(
+        error_correction=error_correction_level(error_correction),
+        box_size=box_size,
+        border=border,
+    )
+    qr.modules = [list(row) for row in matrix]
+    qr.modules_count = len(matrix)
+    qr.version = (len(matrix) - 17) // 4
+    qr.data_cache = []  # anything but None marks the code as made
 
+    # Only a transparent background gets here
+    img = qr.make_image(fill_color=fill_color, back_color=back_color)
     img.save(output_path)
     return output_path
 
 
+def qr_bytes(data: str, fmt: str = "png", **options: Any) -> bytes:
+    """Encode a QR code to PNG or SVG bytes in memory, without a file
+
+    Takes the same options as generate_qr.
+    """
+    import io
+
+    buffer = io.BytesIO()
+    generate_qr(data, buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Batch generation
+# ---------------------------------------------------------------------------
+
+
+def read_batch_rows(input_path: str) -> Iterator[dict[str, Any]]:
+    """Stream rows from a CSV or JSONL file without loading it all
+
+    JSONL is used for .jsonl/.ndjson files, CSV otherwise. Lines that are
+    not valid JSON are yielded with an `_error` key so they are reported
+    like any other failed row.
+    """
+    import csv
+    import json
+
+    with open(input_path, newline="", encoding="utf-8") as f:
+        if input_path.lower().endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    row = {"_error": f"invalid JSON: {exc}"}
+                yield row if isinstance(row, dict) else {"_error": "not an object"}
+        else:
+            yield from csv.DictReader(f)
+
+
+def _output_name(name: str) -> str:
+    """Normalize a row's output name to a relative "/"-separated path
+
+    Raises ValueError for absolute names and ".." parts, which would
+    place the image outside the output folder.
+    """
+    path = name.replace("\\", "/")
+    parts = [part for part in path.split("/") if part not in ("", ".")]
+    if path.startswith("/") or os.path.splitdrive(name)[0] or ".." in parts:
+        raise ValueError(f"output must stay inside the output folder: {name}")
+    if not parts:
+        raise ValueError(f"invalid output name: {name!r}")
+    return "/".join(parts)
+
+
+# One batch result: (row number, data, entry name or output path,
+# encoded image when writing to an archive, error)
+BatchResult = tuple[int, str, str | None, bytes | None, str | None]
+
+
+class _ArchiveWriter:
+    """Append generated images to a ZIP or tar archive as they arrive
+
+    Tar archives are opened in stream mode ("w|"), so the file is written
+    strictly front to back. PNGs are stored in ZIPs without recompression.
+    """
+
+    def __init__(self, path: str):
+        import tarfile
+        import zipfile
+
+        lower = path.lower()
+        self.zip: Any = None
+        self.tar: Any = None
+        if lower.endswith(".zip"):
+            self.zip = zipfile.ZipFile(path, "w")
+        elif lower.endswith((".tar.gz", ".tgz")):
+            self.tar = tarfile.open(path, "w|gz")
+        elif lower.endswith(".tar.bz2"):
+            self.tar = tarfile.open(path, "w|bz2")
+        elif lower.endswith(".tar.xz"):
+            self.tar = tarfile.open(path, "w|xz")
+        elif lower.endswith(".tar"):
+            self.tar = tarfile.open(path, "w|")
+        else:
+            raise ValueError(f"Unsupported archive type: {path}")
+
+    def add(self, name: str, payload: bytes) -> None:
+        import io
+        import tarfile
+        import zipfile
+
+        if self.zip is not None:
+            info = zipfile.ZipInfo(name, time.localtime()[:6])
+            info.compress_type = (
+                zipfile.ZIP_STORED
+                if name.lower().endswith(".png")
+                else zipfile.ZIP_DEFLATED
+            )
+            self.zip.writestr(info, payload)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(payload)
+            info.mtime = int(time.time())
+            self.tar.addfile(info, io.BytesIO(payload))
+
+    def close(self) -> None:
+        (self.zip or self.tar).close()
+
+
+def _generate_chunk(
+    chunk: list[tuple[int, dict[str, Any]]],
+    output_dir: str | None,
+    defaults: dict[str, Any],
+) -> list[BatchResult]:
+    """Generate one chunk of batch rows in a worker process
+
+    Images are written to output_dir, or returned encoded (for the parent
+    to add to an archive) when output_dir is None.
+    """
+    results: list[BatchResult] = []
+    for number, row in chunk:
+        data = str(row.get("data") or "")
+        try:
+            if "_error" in row:
+                raise ValueError(row["_error"])
+            if not data:
+                raise ValueError("missing data")
+            options = dict(defaults)
+            for key, convert in ROW_OPTIONS.items():
+                if row.get(key) not in (None, ""):
+                    options[key] = convert(row[key])
+            fmt = options.pop("format").lower()
+            if fmt not in ("png", "svg"):
+                raise ValueError(f"unknown format: {fmt}")
+            name = _output_name(str(row.get("output") or f"qr_{number:05d}.{fmt}"))
+            if output_dir is None:
+                payload = qr_bytes(data, fmt, **options)
+                results.append((number, data, name, payload, None))
+            else:
+                output_path = os.path.join(output_dir, *name.split("/"))
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                generate_qr(data=data, output_path=output_path, fmt=fmt, **options)
+                results.append((number, data, output_path, None, None))
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            results.append((number, data, None, None, error))
+    return results
+
+
+def generate_batch(
+    input_path: str,
+    output_dir: str | None,
+    workers: int | None = None,
+    defaults: dict[str, Any] | None = None,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    archive: str | None = None,
+) -> tuple[int, list[tuple[int, str]]]:
+    """Generate a QR code for every row of a CSV/JSONL file on a process pool
+
+    Rows are read lazily and sent to the workers in chunks, with only a
+    few chunks in flight per worker, so memory stays flat for large files
+    and qrcode/PIL are imported once per worker rather than once per code.
+    A failing row is recorded and the run continues.
+
+    With archive, workers return the encoded images and this process
+    streams them into one ZIP or tar file, followed by a manifest.csv
+    entry mapping each row's data to its entry name (or error). A row
+    whose entry name is already taken fails. Nothing is written to
+    output_dir.
+
+    Args:
+        input_path: CSV or JSONL file with one code per row
+        output_dir: Directory the images are written to
+        workers: Number of worker processes (default: CPU count)
+        defaults: Generation options for rows that do not set them
+        chunk_size: Rows sent to a worker at a time
+        archive: .zip, .tar, .tar.gz/.tgz, .tar.bz2 or .tar.xz file to
+            write instead of separate files
+
+    Returns:
+        Tuple of (generated_count, [(row_number, error), ...])
+    """
+    import csv
+    import io
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    from itertools import islice
+
+    options = {
+        "format": "png",
+        "error_correction": "M",
+        "box_size": 10,
+        "border": 4,
+        "fill_color": "black",
+        "back_color": "white",
+        **(defaults or {}),
+    }
+
+    writer = _ArchiveWriter(archive) if archive else None
+    manifest = io.StringIO()
+    manifest_csv = csv.writer(manifest)
+    manifest_csv.writerow(["row", "data", "entry", "error"])
+    if writer is None:
+        output_dir = output_dir or "."
+        os.makedirs(output_dir, exist_ok=True)
+    else:
+        output_dir = None
+
+    rows = enumerate(read_batch_rows(input_path), start=1)
+    generated = 0
+    failures: list[tuple[int, str]] = []
+    entries = {"manifest.csv"}
+    start = time.perf_counter()
+    last_report = start
+
+    workers = workers or os.cpu_count() or 1
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: set[Any] = set()
+            while True:
+                # Keep every worker busy without queueing the whole file
+                while len(pending) < workers * 2:
+                    chunk = list(islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    pending.add(
+                        pool.submit(_generate_chunk, chunk, output_dir, options)
+                    )
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for number, data, name, payload, error in future.result():
+                        if writer is not None and name in entries:
+                            error = f"ValueError: duplicate entry name: {name}"
+                            name = None
+                        if error:
+                            failures.append((number, error))
+                            print(f"Row {number}: {error}", file=sys.stderr)
+                        else:
+                            generated += 1
+                            if writer is not None and name and payload is not None:
+                                writer.add(name, payload)
+                                entries.add(name)
+                        if writer is not None:
+                            row = [number, data, name or "", error or ""]
+                            manifest_csv.writerow(row)
+
+                now = time.perf_counter()
+                if now - last_report >= 2:
+                    rate = generated / (now - start)
+                    print(f"  {generated} generated ({rate:.0f}/s)...", file=sys.stderr)
+                    last_report = now
+
+        if writer is not None:
+            writer.add("manifest.csv", manifest.getvalue().encode("utf-8"))
+    finally:
+        if writer is not None:
+            writer.close()
+    return generated, sorted(failures)
+
+
+# ---------------------------------------------------------------------------
+# Sheets
+# ---------------------------------------------------------------------------
+
+
+class _PngStreamWriter:
+    """Write a PNG strip by strip, compressing rows as they arrive
+
+    PIL can only save a complete image, so a tall sheet would need to be
+    in memory all at once. PNG is simple enough to write directly: the
+    raw rows of each strip (from Image.tobytes) go through one zlib stream.
+    """
+
+    COLOR_TYPES = {"1": (1, 0), "L": (8, 0), "RGB": (8, 2)}
+
+    def __init__(self, f: Any, width: int, height: int, mode: str):
+        import struct
+        import zlib
+
+        self.f = f
+        self.mode = mode
+        self.compressor = zlib.compressobj(9)
+        bit_depth, color_type = self.COLOR_TYPES[mode]
+        _ = f.write(b"\x89PNG\r\n\x1a\n")
+        header = struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)
+        self._chunk(b"IHDR", header)
+
+    def _chunk(self, kind: bytes, data: bytes) -> None:
+        import struct
+        import zlib
+
+        _ = self.f.write(struct.pack(">I", len(data)) + kind + data)
+        _ = self.f.write(struct.pack(">I", zlib.crc32(kind + data)))
+
+    def write(self, strip: Any) -> None:
+        raw = strip.convert(self.mode).tobytes()
+        stride = len(raw) // strip.height
+        for y in range(strip.height):
+            data = self.compressor.compress(
+                b"\x00" + raw[y * stride : (y + 1) * stride]  # filter: none
+            )
+            if data:
+                self._chunk(b"IDAT", data)
+
+    def close(self) -> None:
+        self._chunk(b"IDAT", self.compressor.flush())
+        self._chunk(b"IEND", b"")
+
+
+def _load_font(size: int) -> Any:
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single bitmap font
+        return ImageFont.load_default()
+
+
+def generate_sheet(
+    items: Sequence[tuple[str, str | None]],
+    output_path: str,
+    columns: int = 4,
+    rows_per_page: int = 6,
+    cell_size: int = 300,
+    error_correction: str = "M",
+    border: int = 4,
+    fill_color: str = "black",
+    back_color: str = "white",
+    captions: bool = False,
+    dpi: int = 300,
+    cache_dir: str | None = None,
+) -> tuple[int, list[tuple[int, str]]]:
+    """Lay out many QR codes on a grid in one PDF, PNG or SVG file
+
+    The format follows the output extension. A PDF gets one page per
+    columns x rows_per_page codes; PNG and SVG get one tall sheet. Only one
+    row of codes (one page for PDF) is rendered at a time and written out
+    before the next, so memory does not grow with the number of codes.
+    Each code is scaled to the largest whole box size that fits its cell.
+
+    Args:
+        items: (data, caption) pairs; a None caption falls back to the data
+        output_path: .pdf, .png or .svg file to write
+        columns: Codes per row
+        rows_per_page: Rows per PDF page
+        cell_size: Width and height of a code's cell in pixels
+        error_correction: L, M, Q or H
+        border: Quiet zone around each code, in modules
+        fill_color: Module color
+        back_color: Background color
+        captions: Print each code's caption under it
+        dpi: Resolution of PDF pages
+        cache_dir: Optional on-disk matrix cache, see qr_matrix
+
+    Returns:
+        Tuple of (placed_count, [(item_number, error), ...]); a failed
+        item leaves its cell empty
+    """
+    from PIL import Image, ImageDraw
+
+    fmt = os.path.splitext(output_path)[1].lower().lstrip(".")
+    if fmt not in ("pdf", "png", "svg"):
+        raise ValueError(f"Unsupported sheet format: {fmt or output_path}")
+    if str(back_color).lower() == "transparent":
+        raise ValueError("Sheets need an opaque back color")
+
+    caption_size = max(10, cell_size // 12)
+    caption_height = caption_size * 3 // 2 if captions else 0
+    row_height = cell_size + caption_height
+    width = columns * cell_size
+    grid_rows = -(-len(items) // columns)  # ceiling division
+    font = _load_font(caption_size) if captions and fmt != "svg" else None
+    mode = "L" if (fill_color, back_color) == ("black", "white") else "RGB"
+
+    placed = 0
+    failures: list[tuple[int, str]] = []
+
+    def cells(row: int) -> Iterator[tuple[int, int, Matrix, str]]:
+        """(x offset, box size, matrix, caption) for each code in a grid row"""
+        nonlocal placed
+        start = row * columns
+        for index, (data, caption) in enumerate(items[start : start + columns]):
+            try:
+                if not data:
+                    raise ValueError("missing data")
+                matrix = qr_matrix(data, error_correction.upper(), cache_dir)
+            except Exception as exc:
+                failures.append((start + index + 1, f"{type(exc).__name__}: {exc}"))
+                continue
+            box = cell_size // (len(matrix) + border * 2)
+            if box < 1:
+                failures.append((start + index + 1, "code does not fit the cell"))
+                continue
+            placed += 1
+            yield index * cell_size, box, matrix, caption or data
+
+    def render_row(row: int) -> Any:
+        strip = Image.new(mode, (width, row_height), back_color)
+        draw = ImageDraw.Draw(strip)
+        for x, box, matrix, caption in cells(row):
+            code = render_matrix(matrix, box, border, fill_color, back_color)
+            offset = (cell_size - code.width) // 2
+            strip.paste(code, (x + offset, offset))
+            if font is not None:
+                # Trim long captions to the cell width, less some padding
+                max_width = cell_size - caption_size
+                while len(caption) > 1 and draw.textlength(caption, font) > max_width:
+                    caption = caption[:-2] + "…"
+                draw.text(
+                    (x + cell_size // 2, cell_size + caption_height // 2),
+                    caption,
+                    fill=fill_color,
+                    font=font,
+                    anchor="mm",
+                )
+        return strip
+
+    with _replacing(output_path) as tmp_path:
+        if fmt == "pdf":
+            # Each page is appended to the file as an incremental update
+            for page_start in range(0, max(grid_rows, 1), rows_per_page):
+                page = Image.new(mode, (width, rows_per_page * row_height), back_color)
+                for row in range(
+                    page_start, min(page_start + rows_per_page, grid_rows)
+                ):
+                    page.paste(render_row(row), (0, (row - page_start) * row_height))
+                page.save(tmp_path, "PDF", resolution=dpi, append=page_start > 0)
+        elif fmt == "png":
+            with open(tmp_path, "wb") as f:
+                writer = _PngStreamWriter(f, width, grid_rows * row_height, mode)
+                for row in range(grid_rows):
+                    writer.write(render_row(row))
+                writer.close()
+        else:
+            from xml.sax.saxutils import escape, quoteattr
+
+            height = grid_rows * row_height
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                _ = f.write(
+                    '<?xml version="1.0" encoding="UTF-8"?>\n'
+                    f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+                    f'height="{height}" viewBox="0 0 {width} {height}">\n'
+                    f'<rect width="100%" height="100%" fill={quoteattr(back_color)}/>\n'
+                )
+                for row in range(grid_rows):
+                    y = row * row_height
+                    for x, box, matrix, caption in cells(row):
+                        offset = (cell_size - (len(matrix) + border * 2) * box) // 2
+                        _ = f.write(
+                            f'<path transform="translate({x + offset} {y + offset}) '
+                            f'scale({box})" fill={quoteattr(fill_color)} '
+                            f'd="{matrix_svg_path(matrix, border)}"/>\n'
+                        )
+                        if captions:
+                            _ = f.write(
+                                f'<text x="{x + cell_size // 2}" '
+                                f'y="{y + cell_size + caption_height // 2}" '
+                                f'font-size="{caption_size}" font-family="sans-serif" '
+                                'text-anchor="middle" dominant-baseline="middle" '
+                                f"fill={quoteattr(fill_color)}>{escape(caption)}</text>\n"
+                            )
+                _ = f.write("</svg>\n")
+
+    return placed, failures
+
+
 # ---------------------------------------------------------------------------
 # GUI
 # ---------------------------------------------------------------------------
 
 
 def run_gui() -> None:
+    import queue
     import tkinter as tk
+    from concurrent.futures import ThreadPoolExecutor
     from tkinter import filedialog, messagebox, ttk
 
     try:
-        from PIL import Image as _PilImage
         from PIL import ImageTk as _ImageTk
 
         PIL_AVAILABLE = True
     except ImportError:
-        _PilImage = None  # type: ignore[assignment]
         _ImageTk = None  # type: ignore[assignment]
         PIL_AVAILABLE = False
 
@@ -175,11 +1024,82 @@ def run_gui() -> None:
     preview_frame.grid(row=2, column=0, columnspan=2, **PAD)
 
     PREVIEW_SIZE = 200
+    PREVIEW_DELAY_MS = 150  # wait for a pause in typing before rendering
+    PREVIEW_EMPTY = "Preview will appear here."
     preview_label = ttk.Label(
-        preview_frame, text="Preview will appear here.", width=28, anchor="center"
+        preview_frame, text=PREVIEW_EMPTY, width=28, anchor="center"
     )
     preview_label.pack()
 
+    # The preview is rendered on a single worker thread. Each edit bumps
+    # `latest`; renders for older text are skipped or their results dropped,
+    # and finished renders are handed back to Tk from an after() poll, as
+    # Tk may only be used from the main thread.
+    renderer = ThreadPoolExecutor(max_workers=1)
+    results: queue.Queue[tuple[int, Any, str | None]] = queue.Queue()
+    preview_state: dict[str, Any] = {
+        "latest": 0,  # id of the newest edit
+        "debounce": None,  # after() id of the scheduled render
+        "pending": None,  # future of the newest render
+        "polling": False,
+    }
+
+    def render_preview(render_id: int, data: str) -> None:
+        if render_id != preview_state["latest"]:
+            return  # superseded while queued
+        try:
+            matrix = qr_matrix(data)
+            box_size = max(1, PREVIEW_SIZE // (len(matrix) + 8))
+            results.put((render_id, render_matrix(matrix, box_size), None))
+        except Exception as exc:
+            results.put((render_id, None, str(exc)))
+
+    def renderer_busy() -> bool:
+        pending = preview_state["pending"]
+        return not results.empty() or (pending is not None and not pending.done())
+
+    def poll_preview() -> None:
+        while not results.empty():
+            render_id, pil_img, error = results.get_nowait()
+            if render_id != preview_state["latest"]:
+                continue
+            if pil_img is not None and _ImageTk is not None:
+                photo = _ImageTk.PhotoImage(pil_img)
+                preview_label.configure(image=photo, text="")
+                preview_label.image = photo  # type: ignore[attr-defined]
+            else:
+                preview_label.configure(image="", text=f"Cannot encode: {error}")
+                preview_label.image = None  # type: ignore[attr-defined]
+        if renderer_busy():
+            root.after(30, poll_preview)
+        else:
+            preview_state["polling"] = False
+
+    def start_preview() -> None:
+        preview_state["debounce"] = None
+        data = url_var.get().strip()
+        if not data:
+            preview_label.configure(image="", text=PREVIEW_EMPTY)
+            preview_label.image = None  # type: ignore[attr-defined]
+            return
+        preview_state["pending"] = renderer.submit(
+            render_preview, preview_state["latest"], data
+        )
+        if not preview_state["polling"]:
+            preview_state["polling"] = True
+            root.after(30, poll_preview)
+
+    def on_text_change(*_: Any) -> None:
+        preview_state["latest"] += 1
+        if preview_state["debounce"] is not None:
+            root.after_cancel(preview_state["debounce"])
+        preview_state["debounce"] = root.after(PREVIEW_DELAY_MS, start_preview)
+
+    if PIL_AVAILABLE:
+        url_var.trace_add("write", on_text_change)
+    else:
+        preview_label.configure(text="Install Pillow for a preview.")
+
     # ── Status / Generate ───────────────────────────────────────────────────
     status_var = tk.StringVar()
     status_label = ttk.Label(root, textvariable=status_var, foreground="gray")
@@ -198,44 +1118,20 @@ def run_gui() -> None:
             messagebox.showwarning("Missing path", "Please choose a save location.")
             return
 
-        fmt = fmt_var.get()
-
         try:
-            generate_qr(data=data, output_path=output_path, fmt=fmt)
+            generate_qr(data=data, output_path=output_path, fmt=fmt_var.get())
         except Exception as exc:
             messagebox.showerror("Error", str(exc))
             return
 
         status_var.set(f"Saved: {output_path}")
 
-        # Update preview (PNG only)
-        if (
-            fmt == "png"
-            and PIL_AVAILABLE
-            and _PilImage is not None
-            and _ImageTk is not None
-        ):
-            pil_img = _PilImage.open(output_path)
-            pil_img.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE))
-            photo = _ImageTk.PhotoImage(pil_img)
-            preview_label.configure(image=photo, text="")
-            preview_label.image = photo  # type: ignore[attr-defined]
-        elif fmt == "svg":
-            preview_label.configure(
-                image="", text="SVG saved — open in a browser to preview."
-            )
-            preview_label.image = None  # type: ignore[attr-defined]
-        else:
-            preview_label.configure(
-                image="", text="PNG saved (install Pillow for preview)."
-            )
-            preview_label.image = None  # type: ignore[attr-defined]
-
     ttk.Button(root, text="Generate QR Code", command=generate).grid(
         row=3, column=1, sticky="e", **PAD
     )
 
     root.mainloop()
+    renderer.shutdown(wait=False, cancel_futures=True)
 
 
 # ---------------------------------------------------------------------------
@@ -250,7 +1146,7 @@ def run_cli() -> None:
         epilog=__doc__,
     )
 
-    parser.add_argument("data", help="The text or URL to encode.")
+    parser.add_argument("data", nargs="?", help="The text or URL to encode.")
     parser.add_argument(
         "-o",
         "--output",
@@ -290,23 +1186,156 @@ def run_cli() -> None:
     parser.add_argument(
         "--fill-color",
         default="black",
-        help="Module color for PNG output (default: black).",
+        help="Module color (default: black).",
     )
     parser.add_argument(
         "--back-color",
         default="white",
-        help="Background color for PNG output (default: white).",
+        help="Background color, or 'transparent' (default: white).",
     )
     parser.add_argument(
         "--open",
         action="store_true",
         help="Open the generated file after saving.",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Keep encoded QR matrices in this directory across runs.",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        default=None,
+        help="Generate one code per row of a CSV or JSONL file.",
+    )
+    parser.add_argument(
+        "--output-cache",
+        metavar="DIR",
+        default=None,
+        help="Reuse identical images from this directory instead of "
+        "rendering them again.",
+    )
+    parser.add_argument(
+        "--output-cache-size",
+        type=int,
+        default=OUTPUT_CACHE_MAX_BYTES // (1024 * 1024),
+        help="Size cap of --output-cache in MB; least recently used images "
+        f"are removed first (default: {OUTPUT_CACHE_MAX_BYTES // (1024 * 1024)}).",
+    )
+    parser.add_argument(
+        "--archive",
+        metavar="FILE",
+        default=None,
+        help="With --batch, write every image into one .zip or .tar[.gz|.bz2|.xz] "
+        "file, with a manifest.csv, instead of separate files.",
+    )
+    parser.add_argument(
+        "--sheet",
+        metavar="FILE",
+        default=None,
+        help="With --batch, lay the codes out on a grid in one PDF, PNG or SVG.",
+    )
+    parser.add_argument(
+        "--columns",
+        type=int,
+        default=4,
+        help="Codes per sheet row (default: 4).",
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=6,
+        help="Rows per PDF page (default: 6).",
+    )
+    parser.add_argument(
+        "--cell-size",
+        type=int,
+        default=300,
+        help="Sheet cell size in pixels (default: 300).",
+    )
+    parser.add_argument(
+        "--captions",
+        action="store_true",
+        help="Print each row's caption (or data) under its code on a sheet.",
+    )
+    parser.add_argument(
+        "-d",
+        "--output-dir",
+        default="qr_codes",
+        help="Directory for batch output (default: qr_codes).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for batch mode (default: CPU count).",
+    )
 
     args = parser.parse_args()
+    if bool(args.data) == bool(args.batch):
+        parser.error("give either DATA or --batch FILE")
+    if (args.sheet or args.archive) and not args.batch:
+        parser.error("--sheet and --archive need --batch FILE")
     check_dependencies()
 
     fmt = args.format.lower()
+
+    if args.sheet:
+        items = [
+            (str(row.get("data") or ""), row.get("caption") or None)
+            for row in read_batch_rows(args.batch)
+        ]
+        print(f"Batch    : {args.batch} ({len(items)} rows)")
+        print(f"Sheet    : {os.path.abspath(args.sheet)}")
+        start = time.perf_counter()
+        placed, failures = generate_sheet(
+            items,
+            args.sheet,
+            columns=args.columns,
+            rows_per_page=args.rows,
+            cell_size=args.cell_size,
+            error_correction=args.error_correction,
+            border=args.border,
+            fill_color=args.fill_color,
+            back_color=args.back_color,
+            captions=args.captions,
+            cache_dir=args.cache_dir,
+        )
+        for number, error in failures:
+            print(f"Row {number}: {error}", file=sys.stderr)
+        elapsed = time.perf_counter() - start
+        print(f"Placed {placed} QR code(s) in {elapsed:.1f}s, {len(failures)} failed")
+        sys.exit(1 if failures else 0)
+
+    if args.batch:
+        print(f"Batch    : {args.batch}")
+        print(f"Output   : {os.path.abspath(args.archive or args.output_dir)}")
+        start = time.perf_counter()
+        generated, failures = generate_batch(
+            args.batch,
+            args.output_dir,
+            workers=args.workers,
+            defaults={
+                "format": fmt,
+                "error_correction": args.error_correction,
+                "box_size": args.box_size,
+                "border": args.border,
+                "fill_color": args.fill_color,
+                "back_color": args.back_color,
+                "cache_dir": args.cache_dir,
+                "output_cache": args.output_cache,
+                "output_cache_size": args.output_cache_size * 1024 * 1024,
+            },
+            archive=args.archive,
+        )
+        elapsed = time.perf_counter() - start
+        rate = generated / elapsed if elapsed else 0.0
+        print(
+            f"Generated {generated} QR code(s) in {elapsed:.1f}s ({rate:.0f}/s), "
+            f"{len(failures)} failed"
+        )
+        sys.exit(1 if failures else 0)
     output_path = os.path.abspath(args.output or f"qr_code.{fmt}")
 
     print(f"Encoding : {args.data}")
@@ -322,6 +1351,9 @@ def run_cli() -> None:
         border=args.border,
         fill_color=args.fill_color,
         back_color=args.back_color,
+        cache_dir=args.cache_dir,
+        output_cache=args.output_cache,
+        output_cache_size=args.output_cache_size * 1024 * 1024,
     )
 
     print("QR code generated successfully!")